@@ -1,40 +1,153 @@
 import streamlit as st
 import sqlite3
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import numpy as np
 from datetime import datetime, timedelta
 import hashlib
-import time
+import hmac
 import random
-import qrcode
+import secrets
 from io import BytesIO
 import base64
 import pytz
 import os
-try:
-    from streamlit_js_eval import get_window_size
-except Exception:
-    get_window_size = None
+import uuid
+import html
+import re
+import json
+import copy
+import sys
+import threading
+import queue
+from contextlib import contextmanager
 
-st.set_page_config(layout="wide")
+st.set_page_config(
+    page_title="Sanele Delights - Premium Restaurant",
+    page_icon="🍽️",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
 
 # Set South African timezone
 SA_TIMEZONE = pytz.timezone('Africa/Johannesburg')
 
+# Statuses shown on the kitchen dashboard, and its page size for each
+KITCHEN_STATUSES = ('pending', 'preparing', 'ready')
+ACTIVE_ORDERS_PAGE_SIZE = 100
+
+# Kitchen header figures in one pass; built once so every poll reuses the
+# same text, and with it the connection's cached prepared statement
+KITCHEN_METRICS_SQL = '''
+    SELECT {status_counts},
+           SUM(status IN ('completed', 'collected')
+               AND order_date >= ? AND order_date < ?) as completed_today,
+           AVG(CASE WHEN status IN ('completed', 'collected')
+                    THEN preparation_time_minutes END) as avg_prep_time
+    FROM orders
+'''.format(status_counts=', '.join(f"SUM(status = '{status}') as {status}" for status in KITCHEN_STATUSES))
+
+# Digits after "ORD" in an order token, drawn from the secrets CSPRNG
+ORDER_TOKEN_DIGITS = 10
+
+# Bump whenever create_tables, migrate_database or the default data change
+SCHEMA_VERSION = 2
+
+# Read-only SQLite connections shared by all sessions (writes use one connection)
+DB_READER_POOL_SIZE = 4
+# Prepared statements kept per connection; covers every query the app issues
+DB_STATEMENT_CACHE_SIZE = 256
+# scrypt work factor for staff passwords, stored as "salt$hash" hex
+PASSWORD_SCRYPT_PARAMS = {'n': 16384, 'r': 8, 'p': 1}
+
+DB_PRAGMAS = '''
+    PRAGMA foreign_keys=ON;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-65536;
+    PRAGMA mmap_size=268435456;
+'''
+
+# Menu category filter options
+MENU_CATEGORIES = ('All', 'Beverage', 'Starter', 'Main Course', 'Dessert')
+
+# Order tracking status styling
+STATUS_CONFIG = {
+    'pending':   { 'color': '#FF6B35', 'name': 'Order Received',      'description': 'We have received your order and our chefs are preparing',           'emoji': '📥'},
+    'preparing': { 'color': '#2E86AB', 'name': 'In Preparation',      'description': 'Our master chefs are crafting your culinary experience',             'emoji': '👨‍🍳'},
+    'ready':     { 'color': '#28A745', 'name': 'Ready for Service',    'description': 'Your gourmet meal is ready! Get ready to indulge',                 'emoji': '✅'},
+    'completed': { 'color': '#008000', 'name': 'Experience Complete',  'description': 'Thank you for dining with us! We hope you enjoyed',                 'emoji': '🎉'},
+    'collected': { 'color': '#4B0082', 'name': 'Order Collected',      'description': 'Your takeaway order has been collected',                            'emoji': '📦'}
+}
+
+# Chart colours for payment methods and customer segments
+PAYMENT_COLORS = {
+    'cash': '#27ae60',
+    'card': '#3498db',
+    'credit': '#9b59b6',
+    'mobile': '#e67e22',
+    'vip': '#e74c3c'
+}
+SEGMENT_COLORS = {
+    'VIP': '#e74c3c',        # Red - Premium
+    'Regular': '#3498db',    # Blue - Regular
+    'Occasional': '#2ecc71', # Green - Occasional
+    'One-time': '#f39c12',   # Orange - One-time
+    'New': '#95a5a6'
+}
+
+# Order journey steps per order type: (status, name, icon)
+TAKEAWAY_FLOW = (
+    ('pending', 'Order Received', '📥'),
+    ('preparing', 'In Preparation', '👨‍🍳'),
+    ('ready', 'Ready for Collection', '✅'),
+    ('collected', 'Collected', '📦'),
+)
+DINEIN_FLOW = (
+    ('pending', 'Order Received', '📥'),
+    ('preparing', 'In Preparation', '👨‍🍳'),
+    ('ready', 'Ready to Serve', '🍽️'),
+    ('completed', 'Experience Complete', '🎉'),
+)
+# Position of each status within its flow
+FLOW_INDEX = {
+    flow: {status: i for i, (status, _, _) in enumerate(flow)}
+    for flow in (TAKEAWAY_FLOW, DINEIN_FLOW)
+}
+
+# Tracking-page status banner, rendered once per status at import
+STATUS_HEADER_TEMPLATE = """
+<div style="background: linear-gradient(135deg, {color} 0%, {color}80 100%); 
+            color: white; padding: 3rem 2rem; border-radius: 25px; text-align: center; margin-bottom: 2rem; box-shadow: 0 10px 30px rgba(0,0,0,0.2);">
+    <h1 style="margin: 0; font-size: 4rem;">{emoji}</h1>
+    <h2 style="margin: 15px 0; color: white; font-size: 2.5rem;">{name}</h2>
+    <p style="margin: 0; font-size: 1.3rem; opacity: 0.9;">{description}</p>
+</div>
+"""
+STATUS_HEADER_HTML = {status: STATUS_HEADER_TEMPLATE.format(**info) for status, info in STATUS_CONFIG.items()}
+
+# Widest a local menu photo is sent to the browser
+MENU_IMAGE_WIDTH = 640
+
+# Static part of a menu card, rendered as one markdown element per item
+MENU_CARD_TEMPLATE = """
+<div class="menu-item-card">
+{image}
+<h3 style="margin: 1rem 0 0.5rem 0;">{name}</h3>
+<p><em>{description}</em></p>
+<div style="display: flex; justify-content: space-between;"><strong>💰 R {price}</strong><span>⭐ 4.8</span></div>
+</div>
+"""
+
 def get_sa_time():
     """Get current South African time"""
     return datetime.now(SA_TIMEZONE)
 
 def get_device_type():
+    """'mobile', 'tablet' or 'desktop', or None while the browser has yet to report its size"""
     try:
-        if get_window_size is None:
-            return 'desktop'
+        # Optional, and only the menu needs it - a missing package means desktop
+        from streamlit_js_eval import get_window_size
         size = get_window_size()
         if not size or 'width' not in size:
-            return 'desktop'
+            return None
         w = int(size['width'])
         if w < 768:
             return 'mobile'
@@ -44,26 +157,107 @@ def get_device_type():
     except Exception:
         return 'desktop'
 
+def hash_password(password, salt=None):
+    """Salted scrypt digest of password, formatted salt$hash in hex"""
+    salt = salt or os.urandom(16)
+    digest = hashlib.scrypt(password.encode(), salt=salt, **PASSWORD_SCRYPT_PARAMS)
+    return f"{salt.hex()}${digest.hex()}"
+
+def verify_password(password, stored):
+    """Check password against a stored digest in constant time"""
+    if '$' in stored:
+        salt, _ = stored.split('$', 1)
+        candidate = hash_password(password, bytes.fromhex(salt))
+    else:
+        # Unsalted sha256 from before scrypt; upgraded on next login
+        candidate = hashlib.sha256(password.encode()).hexdigest()
+    return hmac.compare_digest(candidate, stored)
+
+def image_figure(url, caption, loading="lazy", radius=15):
+    """Static remote image as a raw <figure>, so reruns cost Streamlit nothing"""
+    fetchpriority = "high" if loading == "eager" else "auto"
+    return f"""
+    <figure style="margin: 0 0 1rem 0;">
+        <img src="{html.escape(url)}" alt="{html.escape(caption)}" loading="{loading}" fetchpriority="{fetchpriority}" decoding="async"
+             style="width:100%; border-radius:{radius}px; display:block;" />
+        <figcaption style="text-align: center; color: #888; font-size: 0.9rem; margin-top: 0.5rem;">{html.escape(caption)}</figcaption>
+    </figure>
+    """
+
 # Enhanced Database Class with Analytics Support
 class RestaurantDB:
     def __init__(self, db_name="restaurant.db"):
         self.db_name = db_name
         try:
-            self.conn = sqlite3.connect(db_name, check_same_thread=False)
+            # Single writer; WAL lets the reader pool keep going while it commits
+            self.conn = sqlite3.connect(db_name, check_same_thread=False,
+                                        cached_statements=DB_STATEMENT_CACHE_SIZE)
             self.conn.row_factory = sqlite3.Row
-            self.create_tables()
-            self.migrate_database()
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.executescript(DB_PRAGMAS)
+            self._write_lock = threading.RLock()
+            # Schema, migrations and seed data only run when the stored version lags;
+            # a failed migration leaves the version alone so the next start retries it
+            if self.schema_version() != SCHEMA_VERSION:
+                self.create_tables()
+                if self.migrate_database():
+                    self.conn.execute("INSERT OR REPLACE INTO _meta (k, v) VALUES ('schema_version', ?)",
+                                      (str(SCHEMA_VERSION),))
+                    self.conn.commit()
+                    # Give the planner statistics for any new indexes; sampled, so cheap
+                    self.conn.execute('PRAGMA analysis_limit=400')
+                    self.conn.execute('ANALYZE')
+            # Refresh planner statistics where they are missing or stale
+            self.conn.execute('PRAGMA optimize')
+            
+            self._readers = queue.LifoQueue()
+            for _ in range(DB_READER_POOL_SIZE):
+                reader = sqlite3.connect(db_name, check_same_thread=False, isolation_level=None,
+                                         cached_statements=DB_STATEMENT_CACHE_SIZE)
+                reader.row_factory = sqlite3.Row
+                reader.executescript(DB_PRAGMAS)
+                self._readers.put(reader)
         except Exception as e:
             st.error(f" Database connection failed: {e}")
             raise e
     
+    @contextmanager
+    def reader(self):
+        """Borrow a pooled read connection"""
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+    
+    @contextmanager
+    def writer(self):
+        """Hold the write connection for the duration of the block"""
+        with self._write_lock:
+            yield self.conn
+    
+    def schema_version(self):
+        """Schema version recorded in _meta, or None for a database that predates it"""
+        try:
+            row = self.conn.execute("SELECT v FROM _meta WHERE k = 'schema_version'").fetchone()
+        except sqlite3.OperationalError:
+            return None
+        return int(row['v']) if row else None
+    
+    @staticmethod
+    def date_window(days):
+        """(start, end) bounds for the last `days` days, bound as plain order_date strings"""
+        end_date = get_sa_time()
+        start_date = end_date - timedelta(days=days)
+        return start_date.strftime('%Y-%m-%d %H:%M:%S'), end_date.strftime('%Y-%m-%d %H:%M:%S')
+    
     def migrate_database(self):
-        """Migrate existing database to new schema if needed"""
+        """Migrate existing database to new schema if needed; True once every step has committed"""
         cursor = self.conn.cursor()
         try:
             # Check if new analytics columns exist
             cursor.execute("PRAGMA table_info(orders)")
-            columns = [column[1] for column in cursor.fetchall()]
+            columns = [column['name'] for column in cursor.fetchall()]
             
             new_columns = {
                 'completion_time': 'TIMESTAMP',
@@ -79,7 +273,7 @@ class RestaurantDB:
             
             # Check if menu_items has cost_price column
             cursor.execute("PRAGMA table_info(menu_items)")
-            menu_columns = [column[1] for column in cursor.fetchall()]
+            menu_columns = [column['name'] for column in cursor.fetchall()]
             
             if 'cost_price' not in menu_columns:
                 st.info("🔄 Adding cost_price to menu_items...")
@@ -97,6 +291,20 @@ class RestaurantDB:
                 for item_name, cost in cost_prices.items():
                     cursor.execute('UPDATE menu_items SET cost_price = ? WHERE name = ?', (cost, item_name))
             
+            # Order lines carry their dish's category and unit cost, so sales
+            # rollups group and cost them without joining menu_items
+            cursor.execute("PRAGMA table_info(order_items)")
+            item_columns = [column['name'] for column in cursor.fetchall()]
+            
+            if 'category' not in item_columns:
+                cursor.execute('ALTER TABLE order_items ADD COLUMN category TEXT')
+                cursor.execute('ALTER TABLE order_items ADD COLUMN cost_price REAL')
+                cursor.execute('''
+                    UPDATE order_items
+                    SET category = (SELECT category FROM menu_items WHERE id = order_items.menu_item_id),
+                        cost_price = (SELECT cost_price FROM menu_items WHERE id = order_items.menu_item_id)
+                ''')
+            
             self.conn.commit()
             
             # Synchronize menu items to the new default set
@@ -140,17 +348,20 @@ class RestaurantDB:
                         ''', (name, desc, price, category, img, cost, pop))
                 self.conn.commit()
             except Exception as e:
+                self.conn.rollback()
                 st.error(f" Error synchronizing menu items: {e}")
+                return False
         
         except Exception as e:
+            self.conn.rollback()
             st.error(f"Database migration error: {e}")
+            return False
+        
+        return True
 
     def create_tables(self):
         cursor = self.conn.cursor()
         
-        # Enable foreign keys
-        cursor.execute("PRAGMA foreign_keys = ON")
-        
         # Users table (staff only)
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS users (
@@ -209,6 +420,8 @@ class RestaurantDB:
                 quantity INTEGER NOT NULL,
                 price REAL NOT NULL,
                 special_instructions TEXT,
+                category TEXT,
+                cost_price REAL,
                 FOREIGN KEY (order_id) REFERENCES orders (id) ON DELETE CASCADE,
                 FOREIGN KEY (menu_item_id) REFERENCES menu_items (id)
             )
@@ -240,631 +453,829 @@ class RestaurantDB:
             )
         ''')
         
+        # One-off setup markers, e.g. whether default data has been seeded
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS _meta (
+                k TEXT PRIMARY KEY,
+                v TEXT
+            )
+        ''')
+
+        # Keep each order's total equal to the sum of its lines
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_order_items_total
+            AFTER INSERT ON order_items
+            BEGIN
+                UPDATE orders SET total_amount = total_amount + NEW.quantity * NEW.price
+                WHERE id = NEW.order_id;
+            END
+        ''')
+
+        # Index for the kitchen's active-orders seek
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_orders_status ON orders (status, order_date)')
+        # Index for the menu's category filter
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_menu_items_category ON menu_items (category, available)')
+        # Covering index for the analytics date window
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_orders_date ON orders (order_date, status, total_amount)')
+        # Join and lookup indexes for order lines
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_order_items_order ON order_items (order_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_order_items_menu ON order_items (menu_item_id)')
+        # Child-key index so ON DELETE CASCADE from orders is a seek, not a scan
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_order_status_history_order ON order_status_history (order_id)')
+
         self.conn.commit()
         self.insert_default_data()
 
     def insert_default_data(self):
-        cursor = self.conn.cursor()
+        with self.writer():
+            cursor = self.conn.cursor()
+            
+            # Seeded databases start up with this one lookup
+            cursor.execute("SELECT 1 FROM _meta WHERE k = 'seeded'")
+            if cursor.fetchone():
+                return
         
-        # Insert default admin user
-        try:
-            cursor.execute('''
+            # Default admin user and sample staff
+            staff_users = [
+                ('admin', 'admin123', 'admin'),
+                ('chef2025', 'chef@2025', 'chef2025'),
+                ('manager', 'manager123', 'manager'),
+                ('staff', 'staff123', 'staff')
+            ]
+            # Only hash for accounts that are missing; scrypt is slow on purpose
+            cursor.execute('SELECT username FROM users')
+            existing = {row['username'] for row in cursor.fetchall()}
+        
+            cursor.executemany('''
                 INSERT OR IGNORE INTO users (username, password, role) 
                 VALUES (?, ?, ?)
-            ''', ('admin', hashlib.sha256('admin123'.encode()).hexdigest(), 'admin'))
-        except sqlite3.IntegrityError:
-            pass
-        
-        # Insert sample staff
-        staff_users = [
-            ('chef2025', 'chef@2025', 'chef2025'),
-            ('manager', 'manager123', 'manager'),
-            ('staff', 'staff123', 'staff')
-        ]
-        
-        for username, password, role in staff_users:
-            try:
-                cursor.execute('''
-                    INSERT OR IGNORE INTO users (username, password, role) 
-                    VALUES (?, ?, ?)
-                ''', (username, hashlib.sha256(password.encode()).hexdigest(), role))
-            except sqlite3.IntegrityError:
-                pass
-        
-        # Check if menu items already exist
-        cursor.execute('SELECT COUNT(*) FROM menu_items')
-        if cursor.fetchone()[0] == 0:
-            # Premium menu with cost prices and initial popularity
-            menu_items = [
-                # BEVERAGES
-                ('Bottled Water', 'Still bottled water', 15, 'Beverage', 'bottled_water.jpg', 5, 0),
-                ('Iced Coffee', 'Chilled coffee over ice', 35, 'Beverage', 'iced_coffee.jpg', 12, 0),
+            ''', [(username, hash_password(password), role)
+                  for username, password, role in staff_users if username not in existing])
+        
+            # Check if menu items already exist
+            cursor.execute('SELECT COUNT(*) AS item_count FROM menu_items')
+            if cursor.fetchone()['item_count'] == 0:
+                # Premium menu with cost prices and initial popularity
+                menu_items = [
+                    # BEVERAGES
+                    ('Bottled Water', 'Still bottled water', 15, 'Beverage', 'bottled_water.jpg', 5, 0),
+                    ('Iced Coffee', 'Chilled coffee over ice', 35, 'Beverage', 'iced_coffee.jpg', 12, 0),
                 
-                # APPETIZERS
-                ('Garlic Bread', 'Toasted bread with garlic butter', 25, 'Starter', 'garlic_bread.jpg', 10, 0),
-                ('Onion Rings', 'Crispy fried onion rings', 30, 'Starter', 'onion_rings.jpg', 12, 0),
+                    # APPETIZERS
+                    ('Garlic Bread', 'Toasted bread with garlic butter', 25, 'Starter', 'garlic_bread.jpg', 10, 0),
+                    ('Onion Rings', 'Crispy fried onion rings', 30, 'Starter', 'onion_rings.jpg', 12, 0),
                 
-                # MAIN COURSES
-                ('Beef Steak', 'Grilled beef steak', 150, 'Main Course', 'beef_steak.jpg', 90, 0),
-                ('Chicken Burger', 'Chicken burger with fresh garnish', 85, 'Main Course', 'chicken_burger.jpg', 50, 0),
-                ('Grilled Chicken', 'Tender grilled chicken', 120, 'Main Course', 'grilled_chicken.jpg', 70, 0),
-                ('Grilled Fish', 'Seasoned grilled fish', 130, 'Main Course', 'grilled_fish.jpg', 75, 0),
+                    # MAIN COURSES
+                    ('Beef Steak', 'Grilled beef steak', 150, 'Main Course', 'beef_steak.jpg', 90, 0),
+                    ('Chicken Burger', 'Chicken burger with fresh garnish', 85, 'Main Course', 'chicken_burger.jpg', 50, 0),
+                    ('Grilled Chicken', 'Tender grilled chicken', 120, 'Main Course', 'grilled_chicken.jpg', 70, 0),
+                    ('Grilled Fish', 'Seasoned grilled fish', 130, 'Main Course', 'grilled_fish.jpg', 75, 0),
                 
-                # DESSERTS
-                ('Chocolate Cake', 'Rich slice of chocolate cake', 55, 'Dessert', 'chocolate_cake.jpg', 18, 0),
-                ('Ice Cream', 'Scoop of vanilla ice cream', 30, 'Dessert', 'ice_cream.jpg', 10, 0),
-                ('Apple Pie', 'Warm apple pie slice', 45, 'Dessert', 'apple_pie.jpg', 16, 0)
-            ]
+                    # DESSERTS
+                    ('Chocolate Cake', 'Rich slice of chocolate cake', 55, 'Dessert', 'chocolate_cake.jpg', 18, 0),
+                    ('Ice Cream', 'Scoop of vanilla ice cream', 30, 'Dessert', 'ice_cream.jpg', 10, 0),
+                    ('Apple Pie', 'Warm apple pie slice', 45, 'Dessert', 'apple_pie.jpg', 16, 0)
+                ]
             
-            for item in menu_items:
-                cursor.execute('''
+                cursor.executemany('''
                     INSERT INTO menu_items (name, description, price, category, image_url, cost_price, popularity_score)
                     VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', item)
-        
-        self.conn.commit()
+                ''', menu_items)
+            
+            cursor.execute("INSERT OR IGNORE INTO _meta (k, v) VALUES ('seeded', '1')")
+            self.conn.commit()
 
     def add_order(self, customer_name, order_type, items, table_number=None, notes="", payment_method="cash"):
         """Complete rewrite with proper transaction handling"""
-        cursor = self.conn.cursor()
+        with self.writer():
+            cursor = self.conn.cursor()
         
-        try:
-            # Calculate total amount
-            total_amount = sum(item['price'] * item['quantity'] for item in items)
-            
-            # Generate unique order token
-            order_token = f"ORD{random.randint(1000, 9999)}{int(time.time()) % 10000}"
-            current_time = get_sa_time().strftime('%Y-%m-%d %H:%M:%S')
-            
-            # Start transaction
-            self.conn.execute("BEGIN TRANSACTION")
-            
-            # Insert order
-            cursor.execute('''
-                INSERT INTO orders (
-                    customer_name, order_type, table_number, total_amount, 
-                    notes, order_token, order_date, payment_method
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (customer_name, order_type, table_number, total_amount, 
-                  notes, order_token, current_time, payment_method))
+            try:
+                current_time = get_sa_time().strftime('%Y-%m-%d %H:%M:%S')
             
-            order_id = cursor.lastrowid
+                # Start transaction
+                self.conn.execute("BEGIN TRANSACTION")
             
-            # Insert order items
-            for item in items:
-                cursor.execute('''
+                # Insert order under a fresh random token; order_token is UNIQUE,
+                # so a clash fails just this statement and gets one more draw
+                for attempt in range(2):
+                    order_token = f"ORD{secrets.randbelow(10 ** ORDER_TOKEN_DIGITS):0{ORDER_TOKEN_DIGITS}d}"
+                    try:
+                        cursor.execute('''
+                            INSERT INTO orders (
+                                customer_name, order_type, table_number, 
+                                notes, order_token, order_date, payment_method
+                            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                        ''', (customer_name, order_type, table_number, 
+                              notes, order_token, current_time, payment_method))
+                        break
+                    except sqlite3.IntegrityError:
+                        if attempt:
+                            raise
+            
+                order_id = cursor.lastrowid
+            
+                # Insert order items
+                cursor.executemany('''
                     INSERT INTO order_items (
                         order_id, menu_item_id, menu_item_name, quantity, 
-                        price, special_instructions
-                    ) VALUES (?, ?, ?, ?, ?, ?)
-                ''', (order_id, item['id'], item['name'], item['quantity'], 
-                      item['price'], item.get('instructions', '')))
-            
-            # Add initial status to history
-            cursor.execute('''
-                INSERT INTO order_status_history (order_id, status, notes)
-                VALUES (?, ?, ?)
-            ''', (order_id, 'pending', 'Order placed by customer'))
+                        price, special_instructions, category, cost_price
+                    ) SELECT ?, ?, ?, ?, ?, ?, category, cost_price
+                      FROM (SELECT ? AS id) AS item LEFT JOIN menu_items USING (id)
+                ''', [(order_id, item['id'], item['name'], item['quantity'],
+                       item['price'], item.get('instructions', ''), item['id']) for item in items])
             
-            # Update customer analytics
-            self.update_customer_analytics(customer_name, total_amount)
+                # trg_order_items_total has summed the lines into the order
+                cursor.execute('SELECT total_amount FROM orders WHERE id = ?', (order_id,))
+                total_amount = cursor.fetchone()['total_amount']
             
-            # Update menu item popularity
-            for item in items:
-                self.update_menu_item_popularity(item['id'])
-            
-            # Commit transaction
-            self.conn.commit()
+                # Add initial status to history
+                cursor.execute('''
+                    INSERT INTO order_status_history (order_id, status, notes)
+                    VALUES (?, ?, ?)
+                ''', (order_id, 'pending', 'Order placed by customer'))
             
-            # Verify the order was created
-            cursor.execute('SELECT id, order_token, status FROM orders WHERE id = ?', (order_id,))
-            order_verify = cursor.fetchone()
+                # Update customer analytics and popularity in the same transaction
+                self.update_customer_analytics(customer_name, total_amount, commit=False)
+                self.update_menu_item_popularity({item['id'] for item in items}, commit=False)
             
-            if order_verify:
+                # Commit transaction; it raises rather than losing the rows
+                self.conn.commit()
+                clear_order_caches()
+                # customer_analytics changed above, so the customer insights are stale
+                cached_customer_insights.clear()
                 return order_id, order_token
-            else:
-                raise Exception("Order verification failed after commit")
             
-        except Exception as e:
-            self.conn.rollback()
-            st.error(f"Database error in add_order: {str(e)}")
-            raise e
+            except Exception as e:
+                self.conn.rollback()
+                st.error(f"Database error in add_order: {str(e)}")
+                raise e
 
-    def update_customer_analytics(self, customer_name, order_amount):
+    def update_customer_analytics(self, customer_name, order_amount, commit=True):
         """Update customer analytics table"""
-        cursor = self.conn.cursor()
-        try:
-            # Check if customer exists
-            cursor.execute('SELECT * FROM customer_analytics WHERE customer_name = ?', (customer_name,))
-            customer = cursor.fetchone()
+        with self.writer():
+            cursor = self.conn.cursor()
+            try:
+                # Check if customer exists
+                cursor.execute('SELECT * FROM customer_analytics WHERE customer_name = ?', (customer_name,))
+                customer = cursor.fetchone()
             
-            current_time = get_sa_time().strftime('%Y-%m-%d %H:%M:%S')
+                current_time = get_sa_time().strftime('%Y-%m-%d %H:%M:%S')
             
-            if customer:
-                # Update existing customer
-                total_orders = customer['total_orders'] + 1
-                total_spent = customer['total_spent'] + order_amount
-                avg_order_value = total_spent / total_orders
+                if customer:
+                    # Update existing customer
+                    total_orders = customer['total_orders'] + 1
+                    total_spent = customer['total_spent'] + order_amount
+                    avg_order_value = total_spent / total_orders
                 
-                # Determine customer segment
-                if total_orders >= 10:
-                    segment = 'VIP'
-                elif total_orders >= 5:
-                    segment = 'Regular'
-                else:
-                    segment = 'Occasional'
+                    # Determine customer segment
+                    if total_orders >= 10:
+                        segment = 'VIP'
+                    elif total_orders >= 5:
+                        segment = 'Regular'
+                    else:
+                        segment = 'Occasional'
                 
-                cursor.execute('''
-                    UPDATE customer_analytics 
-                    SET total_orders = ?, total_spent = ?, average_order_value = ?, 
-                        last_order_date = ?, customer_segment = ?
-                    WHERE customer_name = ?
-                ''', (total_orders, total_spent, avg_order_value, current_time, segment, customer_name))
-            else:
-                # Insert new customer
-                cursor.execute('''
-                    INSERT INTO customer_analytics 
-                    (customer_name, total_orders, total_spent, average_order_value, last_order_date)
-                    VALUES (?, 1, ?, ?, ?)
-                ''', (customer_name, order_amount, order_amount, current_time))
+                    cursor.execute('''
+                        UPDATE customer_analytics 
+                        SET total_orders = ?, total_spent = ?, average_order_value = ?, 
+                            last_order_date = ?, customer_segment = ?
+                        WHERE customer_name = ?
+                    ''', (total_orders, total_spent, avg_order_value, current_time, segment, customer_name))
+                else:
+                    # Insert new customer
+                    cursor.execute('''
+                        INSERT INTO customer_analytics 
+                        (customer_name, total_orders, total_spent, average_order_value, last_order_date)
+                        VALUES (?, 1, ?, ?, ?)
+                    ''', (customer_name, order_amount, order_amount, current_time))
             
-            self.conn.commit()
+                if commit:
+                    self.conn.commit()
             
-        except Exception as e:
-            st.error(f" Error updating customer analytics: {e}")
+            except Exception as e:
+                st.error(f" Error updating customer analytics: {e}")
 
-    def update_menu_item_popularity(self, menu_item_id):
-        """Update popularity score for menu items"""
-        cursor = self.conn.cursor()
-        try:
-            # Count how many times this item has been ordered
-            cursor.execute('''
-                SELECT COUNT(*) as order_count 
-                FROM order_items 
-                WHERE menu_item_id = ?
-            ''', (menu_item_id,))
-            result = cursor.fetchone()
-            order_count = result['order_count'] if result else 0
-            
-            # Update popularity score
-            cursor.execute('''
-                UPDATE menu_items 
-                SET popularity_score = ? 
-                WHERE id = ?
-            ''', (order_count, menu_item_id))
+    def update_menu_item_popularity(self, menu_item_ids, commit=True):
+        """Update popularity score for the given menu items"""
+        with self.writer():
+            cursor = self.conn.cursor()
+            try:
+                # Popularity is how many times each item has been ordered
+                cursor.executemany('''
+                    UPDATE menu_items 
+                    SET popularity_score = (
+                        SELECT COUNT(*) FROM order_items WHERE menu_item_id = menu_items.id
+                    )
+                    WHERE id = ?
+                ''', [(menu_item_id,) for menu_item_id in menu_item_ids])
             
-            self.conn.commit()
+                if commit:
+                    self.conn.commit()
             
-        except Exception as e:
-            st.error(f" Error updating menu item popularity: {e}")
+            except Exception as e:
+                st.error(f" Error updating menu item popularity: {e}")
 
     def get_order_by_token(self, order_token):
-        """Simple and reliable order retrieval"""
-        cursor = self.conn.cursor()
+        """Order row and its items in one round trip"""
+        with self.reader() as conn:
+            cursor = conn.cursor()
         
-        try:
-            # Get basic order info
-            cursor.execute('''
-                SELECT * FROM orders WHERE order_token = ?
-            ''', (order_token,))
-            order = cursor.fetchone()
+            try:
+                # Items ride along as a JSON array, so a tracking poll is one query
+                cursor.execute('''
+                    SELECT o.*,
+                           (SELECT json_group_array(json_object(
+                                       'menu_item_name', oi.menu_item_name, 'quantity', oi.quantity,
+                                       'special_instructions', oi.special_instructions, 'price', oi.price))
+                            FROM order_items oi
+                            WHERE oi.order_id = o.id) as order_items
+                    FROM orders o
+                    WHERE o.order_token = ?
+                ''', (order_token,))
+                order = cursor.fetchone()
+            
+                if not order:
+                    return None
+            
+                # Plain dict, keyed like the kitchen's active order rows
+                order = dict(order)
+                items = json.loads(order.pop('order_items') or '[]')
+            
+                # Format items string
+                items_list = []
+                for item in items:
+                    item_str = f"{item['menu_item_name']} (x{item['quantity']}) - R{item['price'] * item['quantity']}"
+                    if item['special_instructions']:
+                        item_str += f" - {item['special_instructions']}"
+                    items_list.append(item_str)
+            
+                order['items'] = ", ".join(items_list)
+                order['item_count'] = len(items)
+            
+                return order
             
-            if not order:
+            except Exception as e:
+                st.error(f" Error in get_order_by_token: {str(e)}")
                 return None
-            
-            # Get order items
-            cursor.execute('''
-                SELECT menu_item_name, quantity, special_instructions, price
-                FROM order_items 
-                WHERE order_id = ?
-            ''', (order['id'],))
-            items = cursor.fetchall()
-            
-            # Format items string
-            items_list = []
-            for item in items:
-                item_str = f"{item['menu_item_name']} (x{item['quantity']}) - R{item['price'] * item['quantity']}"
-                if item['special_instructions']:
-                    item_str += f" - {item['special_instructions']}"
-                items_list.append(item_str)
-            
-            items_str = ", ".join(items_list)
-            
-            # Convert to tuple for compatibility
-            order_tuple = (
-                order['id'], order['table_number'], order['customer_name'],
-                order['order_type'], order['status'], order['total_amount'],
-                order['order_date'], order['notes'], order['estimated_wait_time'],
-                order['order_token'], order['payment_method'], items_str, len(items)
-            )
-            
-            return order_tuple
-            
-        except Exception as e:
-            st.error(f" Error in get_order_by_token: {str(e)}")
-            return None
 
     def get_order_status(self, order_token):
         """Simple status retrieval"""
-        cursor = self.conn.cursor()
-        try:
-            cursor.execute('SELECT status FROM orders WHERE order_token = ?', (order_token,))
-            result = cursor.fetchone()
-            return result['status'] if result else None
-        except Exception as e:
-            st.error(f" Error getting order status: {str(e)}")
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute('SELECT status FROM orders WHERE order_token = ?', (order_token,))
+                result = cursor.fetchone()
+                return result['status'] if result else None
+            except Exception as e:
+                st.error(f" Error getting order status: {str(e)}")
+                return None
+
+    def authenticate_staff(self, username, password):
+        """The staff user's id, username and role if the password matches, else None"""
+        with self.reader() as conn:
+            row = conn.execute('SELECT id, username, password, role FROM users WHERE username = ?', (username,)).fetchone()
+        if not row or not verify_password(password, row['password']):
             return None
+        # Legacy unsalted sha256 digests are rehashed with scrypt on their first good login
+        if '$' not in row['password']:
+            with self.writer():
+                self.conn.execute('UPDATE users SET password = ? WHERE id = ?', (hash_password(password), row['id']))
+                self.conn.commit()
+        return {'id': row['id'], 'username': row['username'], 'role': row['role']}
 
     def update_order_status(self, order_id, new_status, notes=""):
-        cursor = self.conn.cursor()
-        try:
-            cursor.execute('UPDATE orders SET status = ? WHERE id = ?', (new_status, order_id))
-            cursor.execute('''
-                INSERT INTO order_status_history (order_id, status, notes)
-                VALUES (?, ?, ?)
-            ''', (order_id, new_status, notes))
-            self.conn.commit()
-            return True
-        except Exception as e:
-            st.error(f" Error updating order status: {str(e)}")
-            return False
+        # A batch of one: same transaction and rollback as the kitchen's commits
+        return self.bulk_update_order_status([(order_id, new_status, notes)])
 
-    def get_active_orders(self):
-        cursor = self.conn.cursor()
-        try:
-            cursor.execute('''
-                SELECT o.*, 
-                       GROUP_CONCAT(oi.menu_item_name || ' (x' || oi.quantity || ')', ', ') as items,
-                       COUNT(oi.id) as item_count
-                FROM orders o
-                LEFT JOIN order_items oi ON o.id = oi.order_id
-                WHERE o.status NOT IN ('completed', 'collected')
-                GROUP BY o.id 
-                ORDER BY o.order_date DESC
-            ''')
-            return cursor.fetchall()
-        except Exception as e:
-            st.error(f" Error getting active orders: {str(e)}")
-            return []
+    def bulk_update_order_status(self, ops):
+        """Apply a batch of (order_id, new_status, notes) changes in one transaction"""
+        with self.writer():
+            cursor = self.conn.cursor()
+            try:
+                self.conn.execute("BEGIN TRANSACTION")
+                cursor.executemany('UPDATE orders SET status = ? WHERE id = ?',
+                                   [(new_status, order_id) for order_id, new_status, _ in ops])
+                cursor.executemany('''
+                    INSERT INTO order_status_history (order_id, status, notes)
+                    VALUES (?, ?, ?)
+                ''', ops)
+                self.conn.commit()
+                clear_order_caches()
+                clear_analytics_caches()
+                return True
+            except Exception as e:
+                self.conn.rollback()
+                st.error(f" Error updating order status: {str(e)}")
+                return False
+
+    def get_active_orders(self, statuses=KITCHEN_STATUSES, limit=ACTIVE_ORDERS_PAGE_SIZE, before=None):
+        """Get one page of orders in the given statuses, newest first.
+
+        `before` is the (order_date, id) of the last order on the previous page.
+        """
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            try:
+                params = list(statuses)
+                keyset = ''
+                if before:
+                    keyset = 'AND (o.order_date, o.id) < (?, ?)'
+                    params.extend(before)
+                params.append(limit)
+                cursor.execute(f'''
+                    SELECT o.id, o.customer_name, o.order_type, o.table_number, o.status,
+                           o.total_amount, o.notes, o.order_date,
+                           json_group_array(json_object('name', oi.menu_item_name, 'quantity', oi.quantity))
+                               FILTER (WHERE oi.id IS NOT NULL) as items
+                    FROM orders o
+                    LEFT JOIN order_items oi ON o.id = oi.order_id
+                    WHERE o.status IN ({', '.join('?' * len(statuses))})
+                    {keyset}
+                    GROUP BY o.id
+                    ORDER BY o.order_date DESC, o.id DESC
+                    LIMIT ?
+                ''', params)
+                return cursor.fetchall()
+            except Exception as e:
+                st.error(f" Error getting active orders: {str(e)}")
+                return []
+
+    def get_kitchen_metrics(self):
+        """Active orders per kitchen status, today's completions and average prep time, in one pass"""
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            metrics = dict.fromkeys(KITCHEN_STATUSES, 0)
+            metrics.update(completed_today=0, avg_prep_time=15.0)  # Default to 15 minutes
+            try:
+                today = get_sa_time().date()
+                cursor.execute(KITCHEN_METRICS_SQL, (today.isoformat(), (today + timedelta(days=1)).isoformat()))
+                row = cursor.fetchone()
+                for key in metrics:
+                    if row[key] is not None:
+                        metrics[key] = row[key]
+            except Exception as e:
+                st.error(f" Error getting kitchen metrics: {str(e)}")
+            return metrics
 
     def get_menu_items(self, category=None):
-        cursor = self.conn.cursor()
-        try:
-            if category and category != 'All':
-                query = 'SELECT * FROM menu_items WHERE available = 1 AND category = ? ORDER BY category, name'
-                cursor.execute(query, (category,))
-            else:
-                query = 'SELECT * FROM menu_items WHERE available = 1 ORDER BY category, name'
-                cursor.execute(query)
-            return cursor.fetchall()
-        except Exception as e:
-            st.error(f" Error getting menu items: {str(e)}")
-            return []
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            try:
+                where, params = '', ()
+                if category and category != 'All':
+                    where, params = ' AND category = ?', (category,)
+                cursor.execute('SELECT * FROM menu_items WHERE available = 1' + where + ' ORDER BY category, name', params)
+                return cursor.fetchall()
+            except Exception as e:
+                st.error(f" Error getting menu items: {str(e)}")
+                return []
 
     def get_all_orders_for_debug(self):
         """Debug function to see all orders"""
-        cursor = self.conn.cursor()
-        try:
-            cursor.execute('''
-                SELECT id, order_token, customer_name, status, order_date 
-                FROM orders 
-                ORDER BY id DESC 
-                LIMIT 10
-            ''')
-            return cursor.fetchall()
-        except Exception as e:
-            return []
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute('''
+                    SELECT id, order_token, customer_name, status, order_date 
+                    FROM orders 
+                    ORDER BY id DESC 
+                    LIMIT 10
+                ''')
+                return cursor.fetchall()
+            except Exception as e:
+                return []
 
     def get_sales_analytics(self, days=30):
         """Get comprehensive sales analytics based on REAL order data"""
-        cursor = self.conn.cursor()
+        with self.reader() as conn:
+            cursor = conn.cursor()
         
-        end_date = get_sa_time()
-        start_date = end_date - timedelta(days=days)
+            window = self.date_window(days)
         
-        try:
-            # Daily sales trend - FIXED: Use actual order data
-            cursor.execute('''
-                SELECT DATE(order_date) as date, 
-                       COUNT(*) as order_count,
-                       SUM(total_amount) as revenue,
-                       AVG(total_amount) as avg_order_value
-                FROM orders 
-                WHERE order_date BETWEEN ? AND ?
-                AND status IN ('completed', 'collected')
-                GROUP BY DATE(order_date)
-                ORDER BY date
-            ''', (start_date.strftime('%Y-%m-%d %H:%M:%S'), end_date.strftime('%Y-%m-%d %H:%M:%S')))
-            daily_sales = cursor.fetchall()
-            
-            # Category performance - FIXED: Use order_items data
-            cursor.execute('''
-                SELECT 
-                    CASE 
-                        WHEN mi.category IS NOT NULL THEN mi.category
-                        ELSE 'Unknown'
-                    END as category,
-                    COUNT(oi.id) as items_sold,
-                    SUM(oi.quantity * oi.price) as revenue,
-                    SUM(oi.quantity * (oi.price - COALESCE(mi.cost_price, oi.price * 0.3))) as profit
-                FROM order_items oi
-                LEFT JOIN menu_items mi ON oi.menu_item_id = mi.id
-                JOIN orders o ON oi.order_id = o.id
-                WHERE o.order_date BETWEEN ? AND ?
-                AND o.status IN ('completed', 'collected')
-                GROUP BY category
-                ORDER BY revenue DESC
-            ''', (start_date.strftime('%Y-%m-%d %H:%M:%S'), end_date.strftime('%Y-%m-%d %H:%M:%S')))
-            category_performance = cursor.fetchall()
-            
-            # Hourly distribution - FIXED: Use actual order times
-            cursor.execute('''
-                SELECT 
-                    CASE 
-                        WHEN strftime('%H', order_date) IS NOT NULL THEN strftime('%H', order_date)
-                        ELSE '12'
-                    END as hour,
-                    COUNT(*) as order_count
-                FROM orders 
-                WHERE order_date BETWEEN ? AND ?
-                AND status IN ('completed', 'collected')
-                GROUP BY strftime('%H', order_date)
-                ORDER BY hour
-            ''', (start_date.strftime('%Y-%m-%d %H:%M:%S'), end_date.strftime('%Y-%m-%d %H:%M:%S')))
-            hourly_distribution = cursor.fetchall()
-            
-            # Customer segmentation - FIXED: Use customer analytics
-            cursor.execute('''
-                SELECT 
-                    CASE 
-                        WHEN total_orders >= 10 THEN 'VIP'
-                        WHEN total_orders >= 5 THEN 'Regular'
-                        ELSE 'Occasional'
-                    END as segment,
-                    COUNT(*) as customer_count,
-                    AVG(total_spent) as avg_spent,
-                    SUM(total_spent) as total_revenue
-                FROM customer_analytics
-                WHERE total_orders > 0
-                GROUP BY segment
-            ''')
-            customer_segments = cursor.fetchall()
-            
-            return {
-                'daily_sales': daily_sales,
-                'category_performance': category_performance,
-                'hourly_distribution': hourly_distribution,
-                'customer_segments': customer_segments
-            }
+            try:
+                # Daily trend, category performance and hourly distribution in one pass
+                # over the completed orders in the window, tagged by `kind`
+                cursor.execute('''
+                    WITH recent AS (
+                        SELECT id, order_date, total_amount
+                        FROM orders
+                        WHERE order_date BETWEEN ? AND ?
+                        AND status IN ('completed', 'collected')
+                    )
+                    SELECT 'daily' as kind, DATE(order_date) as bucket,
+                           COUNT(*) as order_count,
+                           SUM(total_amount) as revenue,
+                           AVG(total_amount) as extra
+                    FROM recent
+                    GROUP BY DATE(order_date)
+                    UNION ALL
+                    SELECT 'category', COALESCE(oi.category, 'Unknown'),
+                           COUNT(oi.id),
+                           SUM(oi.quantity * oi.price),
+                           SUM(oi.quantity * (oi.price - COALESCE(oi.cost_price, oi.price * 0.3)))
+                    FROM order_items oi
+                    JOIN recent r ON oi.order_id = r.id
+                    GROUP BY COALESCE(oi.category, 'Unknown')
+                    UNION ALL
+                    SELECT 'hourly', COALESCE(strftime('%H', order_date), '12'),
+                           COUNT(*), NULL, NULL
+                    FROM recent
+                    GROUP BY strftime('%H', order_date)
+                ''', window)
+                
+                daily_sales, category_performance, hourly_distribution = [], [], []
+                for row in cursor.fetchall():
+                    if row['kind'] == 'daily':
+                        daily_sales.append({'date': row['bucket'], 'order_count': row['order_count'],
+                                            'revenue': row['revenue'], 'avg_order_value': row['extra']})
+                    elif row['kind'] == 'category':
+                        category_performance.append({'category': row['bucket'], 'items_sold': row['order_count'],
+                                                     'revenue': row['revenue'], 'profit': row['extra']})
+                    else:
+                        hourly_distribution.append({'hour': row['bucket'], 'order_count': row['order_count']})
+                daily_sales.sort(key=lambda r: r['date'])
+                category_performance.sort(key=lambda r: r['revenue'], reverse=True)
+                hourly_distribution.sort(key=lambda r: r['hour'])
             
-        except Exception as e:
-            st.error(f"Error getting sales analytics: {e}")
-            return None
+                # Customer segmentation - FIXED: Use customer analytics
+                cursor.execute('''
+                    SELECT 
+                        CASE 
+                            WHEN total_orders >= 10 THEN 'VIP'
+                            WHEN total_orders >= 5 THEN 'Regular'
+                            ELSE 'Occasional'
+                        END as segment,
+                        COUNT(*) as customer_count,
+                        AVG(total_spent) as avg_spent,
+                        SUM(total_spent) as total_revenue
+                    FROM customer_analytics
+                    WHERE total_orders > 0
+                    GROUP BY segment
+                ''')
+                customer_segments = cursor.fetchall()
+            
+                return {
+                    'daily_sales': daily_sales,
+                    'category_performance': category_performance,
+                    'hourly_distribution': hourly_distribution,
+                    'customer_segments': customer_segments
+                }
+            
+            except Exception as e:
+                st.error(f"Error getting sales analytics: {e}")
+                return None
 
     def get_financial_metrics(self, days=30):
         """Get comprehensive financial metrics based on REAL order data"""
-        cursor = self.conn.cursor()
+        with self.reader() as conn:
+            cursor = conn.cursor()
         
-        end_date = get_sa_time()
-        start_date = end_date - timedelta(days=days)
+            window = self.date_window(days)
         
-        try:
-            # Revenue and profit trends - FIXED: Use actual order data
-            cursor.execute('''
-                SELECT 
-                    DATE(order_date) as date,
-                    SUM(total_amount) as revenue,
-                    SUM(oi.quantity * (oi.price - COALESCE(mi.cost_price, oi.price * 0.3))) as profit
-                FROM orders o
-                JOIN order_items oi ON o.id = oi.order_id
-                LEFT JOIN menu_items mi ON oi.menu_item_id = mi.id
-                WHERE o.order_date BETWEEN ? AND ?
-                AND o.status IN ('completed', 'collected')
-                GROUP BY DATE(order_date)
-                ORDER BY date
-            ''', (start_date.strftime('%Y-%m-%d %H:%M:%S'), end_date.strftime('%Y-%m-%d %H:%M:%S')))
-            financial_trends = cursor.fetchall()
-            
-            # Payment method analysis - FIXED: Use actual payment data
-            cursor.execute('''
-                SELECT 
-                    COALESCE(payment_method, 'cash') as payment_method,
-                    COUNT(*) as transaction_count,
-                    SUM(total_amount) as total_amount,
-                    AVG(total_amount) as avg_transaction
-                FROM orders 
-                WHERE order_date BETWEEN ? AND ?
-                AND status IN ('completed', 'collected')
-                GROUP BY payment_method
-            ''', (start_date.strftime('%Y-%m-%d %H:%M:%S'), end_date.strftime('%Y-%m-%d %H:%M:%S')))
-            payment_analysis = cursor.fetchall()
-            
-            # Menu item profitability - FIXED: Use actual order items
-            cursor.execute('''
-                SELECT 
-                    COALESCE(mi.name, oi.menu_item_name) as name,
-                    COALESCE(mi.category, 'Unknown') as category,
-                    COUNT(oi.id) as times_ordered,
-                    SUM(oi.quantity * oi.price) as revenue,
-                    SUM(oi.quantity * COALESCE(mi.cost_price, oi.price * 0.3)) as cost,
-                    SUM(oi.quantity * (oi.price - COALESCE(mi.cost_price, oi.price * 0.3))) as profit,
-                    CASE 
-                        WHEN SUM(oi.quantity * oi.price) > 0 THEN 
-                            (SUM(oi.quantity * (oi.price - COALESCE(mi.cost_price, oi.price * 0.3))) / SUM(oi.quantity * oi.price)) * 100
-                        ELSE 0
-                    END as margin_percent
-                FROM order_items oi
-                LEFT JOIN menu_items mi ON oi.menu_item_id = mi.id
-                JOIN orders o ON oi.order_id = o.id
-                WHERE o.order_date BETWEEN ? AND ?
-                AND o.status IN ('completed', 'collected')
-                GROUP BY oi.menu_item_name
-                HAVING times_ordered > 0
-                ORDER BY profit DESC
-                LIMIT 15
-            ''', (start_date.strftime('%Y-%m-%d %H:%M:%S'), end_date.strftime('%Y-%m-%d %H:%M:%S')))
-            profitability = cursor.fetchall()
-            
-            return {
-                'financial_trends': financial_trends,
-                'payment_analysis': payment_analysis,
-                'profitability': profitability
-            }
+            try:
+                # Profit trend, payment mix and item profitability in one pass over the
+                # completed orders in the window and their lines, tagged by `kind`.
+                # Revenue comes from the orders, profit from the lines' snapshotted costs
+                cursor.execute('''
+                    WITH recent AS (
+                        SELECT id, order_date, total_amount, payment_method
+                        FROM orders
+                        WHERE order_date BETWEEN ? AND ?
+                        AND status IN ('completed', 'collected')
+                    ),
+                    lines AS (
+                        SELECT DATE(r.order_date) as day, oi.id, oi.menu_item_name,
+                               oi.quantity, oi.price, oi.category,
+                               COALESCE(oi.cost_price, oi.price * 0.3) as unit_cost
+                        FROM order_items oi
+                        JOIN recent r ON oi.order_id = r.id
+                    ),
+                    daily_profit AS (
+                        SELECT day, SUM(quantity * (price - unit_cost)) as profit
+                        FROM lines
+                        GROUP BY day
+                    )
+                    SELECT 'trend' as kind, DATE(r.order_date) as bucket, NULL as label,
+                           NULL as n, SUM(r.total_amount) as revenue, NULL as cost,
+                           COALESCE(MAX(dp.profit), 0) as profit
+                    FROM recent r
+                    LEFT JOIN daily_profit dp ON dp.day = DATE(r.order_date)
+                    GROUP BY DATE(r.order_date)
+                    UNION ALL
+                    SELECT 'payment', COALESCE(payment_method, 'cash'), NULL,
+                           COUNT(*), SUM(total_amount), AVG(total_amount), NULL
+                    FROM recent
+                    GROUP BY payment_method
+                    UNION ALL
+                    SELECT 'item', menu_item_name, COALESCE(category, 'Unknown'),
+                           COUNT(id), SUM(quantity * price), SUM(quantity * unit_cost),
+                           SUM(quantity * (price - unit_cost))
+                    FROM lines
+                    GROUP BY menu_item_name
+                ''', window)
+                
+                financial_trends, payment_analysis, profitability = [], [], []
+                for row in cursor.fetchall():
+                    if row['kind'] == 'trend':
+                        financial_trends.append({'date': row['bucket'], 'revenue': row['revenue'],
+                                                 'profit': row['profit']})
+                    elif row['kind'] == 'payment':
+                        payment_analysis.append({'payment_method': row['bucket'], 'transaction_count': row['n'],
+                                                 'total_amount': row['revenue'], 'avg_transaction': row['cost']})
+                    else:
+                        revenue = row['revenue']
+                        profitability.append({
+                            'name': row['bucket'], 'category': row['label'], 'times_ordered': row['n'],
+                            'revenue': revenue, 'cost': row['cost'], 'profit': row['profit'],
+                            'margin_percent': (row['profit'] / revenue) * 100 if revenue > 0 else 0
+                        })
+                financial_trends.sort(key=lambda r: r['date'])
+                # Top 15 items by profit
+                profitability.sort(key=lambda r: r['profit'], reverse=True)
+                del profitability[15:]
+            
+                return {
+                    'financial_trends': financial_trends,
+                    'payment_analysis': payment_analysis,
+                    'profitability': profitability
+                }
             
-        except Exception as e:
-            st.error(f"Error getting financial metrics: {e}")
-            return None
+            except Exception as e:
+                st.error(f"Error getting financial metrics: {e}")
+                return None
 
     def get_customer_insights(self):
         """Get customer behavior insights based on REAL data"""
-        cursor = self.conn.cursor()
+        with self.reader() as conn:
+            cursor = conn.cursor()
         
-        try:
-            # Customer lifetime value - FIXED: Use customer analytics
-            cursor.execute('''
-                SELECT 
-                    customer_name,
-                    total_orders,
-                    total_spent,
-                    average_order_value,
-                    customer_segment,
-                    last_order_date
-                FROM customer_analytics
-                WHERE total_orders > 0
-                ORDER BY total_spent DESC
-                LIMIT 20
-            ''')
-            top_customers = cursor.fetchall()
-            
-            # Order frequency analysis - FIXED: Use customer analytics
-            cursor.execute('''
-                SELECT 
-                    CASE 
-                        WHEN total_orders = 1 THEN 'One-time'
-                        WHEN total_orders BETWEEN 2 AND 5 THEN 'Occasional'
-                        WHEN total_orders BETWEEN 6 AND 10 THEN 'Regular'
-                        ELSE 'VIP'
-                    END as frequency,
-                    COUNT(*) as customer_count,
-                    AVG(total_spent) as avg_lifetime_value,
-                    SUM(total_spent) as total_revenue
-                FROM customer_analytics
-                WHERE total_orders > 0
-                GROUP BY frequency
-            ''')
-            frequency_analysis = cursor.fetchall()
-            
-            # Peak ordering patterns - FIXED: Use actual order data
-            cursor.execute('''
-                SELECT 
-                    CASE 
-                        WHEN strftime('%w', order_date) IS NOT NULL THEN strftime('%w', order_date)
-                        ELSE '0'
-                    END as day_of_week,
-                    CASE 
-                        WHEN strftime('%H', order_date) IS NOT NULL THEN strftime('%H', order_date)
-                        ELSE '12'
-                    END as hour,
-                    COUNT(*) as order_count,
-                    AVG(total_amount) as avg_order_value
-                FROM orders
-                WHERE status IN ('completed', 'collected')
-                GROUP BY day_of_week, hour
-                ORDER BY day_of_week, hour
-            ''')
-            ordering_patterns = cursor.fetchall()
-            
-            return {
-                'top_customers': top_customers,
-                'frequency_analysis': frequency_analysis,
-                'ordering_patterns': ordering_patterns
-            }
+            try:
+                # Customer lifetime value - FIXED: Use customer analytics
+                cursor.execute('''
+                    SELECT 
+                        customer_name,
+                        total_orders,
+                        total_spent,
+                        average_order_value,
+                        customer_segment,
+                        last_order_date
+                    FROM customer_analytics
+                    WHERE total_orders > 0
+                    ORDER BY total_spent DESC
+                    LIMIT 20
+                ''')
+                top_customers = cursor.fetchall()
+            
+                # Order frequency analysis - FIXED: Use customer analytics
+                cursor.execute('''
+                    SELECT 
+                        CASE 
+                            WHEN total_orders = 1 THEN 'One-time'
+                            WHEN total_orders BETWEEN 2 AND 5 THEN 'Occasional'
+                            WHEN total_orders BETWEEN 6 AND 10 THEN 'Regular'
+                            ELSE 'VIP'
+                        END as frequency,
+                        COUNT(*) as customer_count,
+                        AVG(total_spent) as avg_lifetime_value,
+                        SUM(total_spent) as total_revenue
+                    FROM customer_analytics
+                    WHERE total_orders > 0
+                    GROUP BY frequency
+                ''')
+                frequency_analysis = cursor.fetchall()
+            
+                # Peak ordering patterns - FIXED: Use actual order data
+                cursor.execute('''
+                    SELECT 
+                        CASE 
+                            WHEN strftime('%w', order_date) IS NOT NULL THEN strftime('%w', order_date)
+                            ELSE '0'
+                        END as day_of_week,
+                        CASE 
+                            WHEN strftime('%H', order_date) IS NOT NULL THEN strftime('%H', order_date)
+                            ELSE '12'
+                        END as hour,
+                        COUNT(*) as order_count,
+                        AVG(total_amount) as avg_order_value
+                    FROM orders
+                    WHERE status IN ('completed', 'collected')
+                    GROUP BY day_of_week, hour
+                    ORDER BY day_of_week, hour
+                ''')
+                ordering_patterns = cursor.fetchall()
+            
+                return {
+                    'top_customers': top_customers,
+                    'frequency_analysis': frequency_analysis,
+                    'ordering_patterns': ordering_patterns
+                }
             
-        except Exception as e:
-            st.error(f"Error getting customer insights: {e}")
-            return None
+            except Exception as e:
+                st.error(f"Error getting customer insights: {e}")
+                return None
 
     def get_popular_menu_items(self, days=30):
         """Get most popular menu items based on actual orders"""
-        cursor = self.conn.cursor()
+        with self.reader() as conn:
+            cursor = conn.cursor()
         
-        end_date = get_sa_time()
-        start_date = end_date - timedelta(days=days)
+            window = self.date_window(days)
         
-        try:
-            cursor.execute('''
-                SELECT 
-                    oi.menu_item_name as name,
-                    COUNT(oi.id) as times_ordered,
-                    SUM(oi.quantity) as total_quantity,
-                    SUM(oi.quantity * oi.price) as total_revenue,
-                    AVG(oi.price) as avg_price
-                FROM order_items oi
-                JOIN orders o ON oi.order_id = o.id
-                WHERE o.order_date BETWEEN ? AND ?
-                AND o.status IN ('completed', 'collected')
-                GROUP BY oi.menu_item_name
-                ORDER BY times_ordered DESC
-                LIMIT 10
-            ''', (start_date.strftime('%Y-%m-%d %H:%M:%S'), end_date.strftime('%Y-%m-%d %H:%M:%S')))
-            
-            return cursor.fetchall()
+            try:
+                cursor.execute('''
+                    SELECT 
+                        oi.menu_item_name as name,
+                        COUNT(oi.id) as times_ordered,
+                        SUM(oi.quantity) as total_quantity,
+                        SUM(oi.quantity * oi.price) as total_revenue,
+                        AVG(oi.price) as avg_price
+                    FROM order_items oi
+                    JOIN orders o ON oi.order_id = o.id
+                    WHERE o.order_date BETWEEN ? AND ?
+                    AND o.status IN ('completed', 'collected')
+                    GROUP BY oi.menu_item_name
+                    ORDER BY times_ordered DESC
+                    LIMIT 10
+                ''', window)
+            
+                return cursor.fetchall()
             
-        except Exception as e:
-            st.error(f" Error getting popular menu items: {e}")
-            return []
+            except Exception as e:
+                st.error(f" Error getting popular menu items: {e}")
+                return []
 
     def get_orders_completed_today(self):
         """Get count of orders completed today"""
-        cursor = self.conn.cursor()
-        try:
-            today = get_sa_time().strftime('%Y-%m-%d')
-            cursor.execute('''
-                SELECT COUNT(*) FROM orders 
-                WHERE DATE(order_date) = ? AND status IN ('completed', 'collected')
-            ''', (today,))
-            result = cursor.fetchone()
-            return result[0] if result and result[0] is not None else 0
-        except Exception as e:
-            st.error(f"Error getting completed orders: {e}")
-            return 0
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            try:
+                # A bare range on order_date lets idx_orders_status seek straight to today
+                today = get_sa_time().date()
+                cursor.execute('''
+                    SELECT COUNT(*) AS order_count FROM orders 
+                    WHERE order_date >= ? AND order_date < ? AND status IN ('completed', 'collected')
+                ''', (today.isoformat(), (today + timedelta(days=1)).isoformat()))
+                result = cursor.fetchone()
+                return result['order_count'] if result and result['order_count'] is not None else 0
+            except Exception as e:
+                st.error(f"Error getting completed orders: {e}")
+                return 0
 
     def get_average_preparation_time(self):
         """Get average preparation time for completed orders"""
-        cursor = self.conn.cursor()
-        try:
-            cursor.execute('''
-                SELECT AVG(preparation_time_minutes) FROM orders 
-                WHERE preparation_time_minutes IS NOT NULL
-                AND status IN ('completed', 'collected')
-            ''')
-            result = cursor.fetchone()
-            return float(result[0]) if result and result[0] is not None else 15.0  # Default to 15 minutes
-        except Exception as e:
-            st.error(f"Error getting average prep time: {e}")
-            return 15.0
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute('''
+                    SELECT AVG(preparation_time_minutes) AS avg_prep FROM orders 
+                    WHERE preparation_time_minutes IS NOT NULL
+                    AND status IN ('completed', 'collected')
+                ''')
+                result = cursor.fetchone()
+                return float(result['avg_prep']) if result and result['avg_prep'] is not None else 15.0  # Default to 15 minutes
+            except Exception as e:
+                st.error(f"Error getting average prep time: {e}")
+                return 15.0
 
-# Initialize database
-def initialize_database():
-    try:
-        db = RestaurantDB()
-        return db
-    except Exception as e:
-        st.error(f"Database initialization error: {e}")
-        return None
+# One RestaurantDB (and its connection pool) shared by every session and rerun
+@st.cache_resource(show_spinner=False)
+def get_db():
+    return RestaurantDB()
+
+try:
+    db = get_db()
+except Exception as e:
+    st.error(f"Database initialization error: {e}")
+    st.stop()
+
+# Shared across dashboard sessions so concurrent polls hit the DB once per window
+@st.cache_data(ttl=5, show_spinner=False)
+def cached_active_orders(statuses=KITCHEN_STATUSES, before=None):
+    orders = []
+    for row in db.get_active_orders(statuses, before=before):
+        order = dict(row, items=json.loads(row['items'] or '[]'))
+        # Formatted once per cache fill rather than on every board render
+        order['items_text'] = ', '.join(f"{item['name']} (x{item['quantity']})" for item in order['items'])
+        orders.append(order)
+    return orders
+
+@st.cache_data(ttl=5, show_spinner=False)
+def cached_kitchen_metrics():
+    return db.get_kitchen_metrics()
+
+@st.cache_data(ttl=30, show_spinner=False)
+def cached_orders_completed_today():
+    return db.get_orders_completed_today()
+
+# Placed orders only change status, so their details can be held longer
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_order_by_token(order_token):
+    return db.get_order_by_token(order_token)
+
+@st.cache_data(ttl=5, show_spinner=False)
+def cached_order_status(order_token):
+    return db.get_order_status(order_token)
+
+def clear_order_caches():
+    """Drop cached kitchen data after an order is placed or changes status"""
+    cached_active_orders.clear()
+    cached_kitchen_metrics.clear()
+    cached_orders_completed_today.clear()
+    cached_order_status.clear()
+
+def plain_rows(data):
+    """Copy sqlite3.Row results into dicts so st.cache_data can pickle them"""
+    if isinstance(data, dict):
+        return {key: plain_rows(rows) for key, rows in data.items()}
+    if isinstance(data, list):
+        return [dict(row) for row in data]
+    return data
+
+# Analytics doesn't need to be second-fresh; writes that change the figures clear these early
+@st.cache_data(ttl=300, show_spinner="Loading analytics…")
+def cached_sales_analytics(days=30):
+    return plain_rows(db.get_sales_analytics(days))
+
+@st.cache_data(ttl=300, show_spinner="Loading analytics…")
+def cached_financial_metrics(days=30):
+    return plain_rows(db.get_financial_metrics(days))
 
-# Global database instance
-db = initialize_database()
+@st.cache_data(ttl=300, show_spinner="Loading analytics…")
+def cached_customer_insights():
+    return plain_rows(db.get_customer_insights())
+
+@st.cache_data(ttl=300, show_spinner="Loading analytics…")
+def cached_popular_menu_items(days=30):
+    return plain_rows(db.get_popular_menu_items(days))
+
+def clear_analytics_caches():
+    """Drop cached analytics after staff move orders to a new status"""
+    cached_sales_analytics.clear()
+    cached_financial_metrics.clear()
+    cached_customer_insights.clear()
+    cached_popular_menu_items.clear()
+
+@st.cache_data(ttl=300, show_spinner=False)
+def cached_menu_items(category=None):
+    # Resolve each photo once per cache fill so the menu grid never has to
+    return [dict(row, image_src=menu_image_src(row['image_url'])) for row in db.get_menu_items(category)]
+
+def clear_menu_cache():
+    """Drop cached menu rows after the menu_items table changes"""
+    cached_menu_items.clear()
+
+def load_active_orders(statuses=KITCHEN_STATUSES, pages=1):
+    """Walk the keyset pages of active orders, newest first"""
+    orders = page = cached_active_orders(statuses)
+    for _ in range(pages - 1):
+        if len(page) < ACTIVE_ORDERS_PAGE_SIZE:
+            break
+        last = page[-1]
+        page = cached_active_orders(statuses, (last['order_date'], last['id']))
+        orders = orders + page
+    return orders
 
 # QR Code Generator
+# Same URL always gives the same image; display size is applied by st.image
+@st.cache_data(max_entries=64, show_spinner=False)
 def generate_qr_code(url):
+    """PNG bytes of a QR code pointing at url"""
+    import qrcode
+    
     qr = qrcode.QRCode(version=1, box_size=10, border=4)
     qr.add_data(url)
     qr.make(fit=True)
     img = qr.make_image(fill_color="black", back_color="white")
     buffered = BytesIO()
-    img.save(buffered, format="PNG")
-    return base64.b64encode(buffered.getvalue()).decode()
+    # Low zlib effort is plenty for a two-colour QR image
+    img.save(buffered, format="PNG", compress_level=1)
+    return buffered.getvalue()
+
+# Local menu photos are re-embedded on every rerun, so ship a card-sized
+# WebP rather than the full-resolution JPEG, and encode it only once
+@st.cache_data(max_entries=64, show_spinner=False)
+def local_image_base64(path, mtime):
+    """Base64 WebP of a local image scaled to MENU_IMAGE_WIDTH; mtime keys out edited files"""
+    from PIL import Image
+    
+    with Image.open(path) as img:
+        img = img.convert("RGB")
+        img.thumbnail((MENU_IMAGE_WIDTH, MENU_IMAGE_WIDTH))
+        buffered = BytesIO()
+        img.save(buffered, format="WEBP", quality=80, method=6)
+    return base64.b64encode(buffered.getvalue()).decode('utf-8')
+
+def menu_image_src(image_url):
+    """<img> src for a menu photo: inline WebP for local files, the URL otherwise, None if unusable"""
+    if not isinstance(image_url, str) or not image_url:
+        return None
+    if not os.path.exists(image_url):
+        return image_url
+    try:
+        return "data:image/webp;base64," + local_image_base64(image_url, os.path.getmtime(image_url))
+    except OSError:
+        return None
 
 # Authentication System
 def staff_login():
@@ -874,21 +1285,12 @@ def staff_login():
     
     if st.sidebar.button("Login", use_container_width=True):
         if username and password:
-            if db is None:
-                st.sidebar.error(" Database not available")
-                return
-                
-            cursor = db.conn.cursor()
-            hashed_password = hashlib.sha256(password.encode()).hexdigest()
-            cursor.execute('SELECT * FROM users WHERE username = ? AND password = ?', (username, hashed_password))
-            user = cursor.fetchone()
-            
+            user = db.authenticate_staff(username, password)
             if user:
                 st.session_state.user = user
                 st.session_state.logged_in = True
                 st.session_state.role = user['role']
-                st.sidebar.success(f"🎉 Welcome back, {user['username']}!")
-                time.sleep(1)
+                st.toast(f"🎉 Welcome back, {user['username']}!")
                 st.rerun()
             else:
                 st.sidebar.error(" Invalid credentials")
@@ -896,35 +1298,69 @@ def staff_login():
 def logout():
     for key in list(st.session_state.keys()):
         del st.session_state[key]
-    st.rerun()
+    st.switch_page(LANDING_PAGE)
+
+# Button callbacks run before the rerun the click triggers, so the new step
+# renders in that same run instead of needing an extra st.rerun()
+def go_to_step(step, **state):
+    """Move the ordering flow to step, setting any extra session values first"""
+    for key, value in state.items():
+        st.session_state[key] = value
+    st.session_state.current_step = step
+
+# Session defaults; mutable values are copied per session in init_session_state
+SESSION_DEFAULTS = {
+    'logged_in': False,
+    'user': None,
+    'current_step': "order_type",
+    'order_type': "dine-in",
+    'customer_name': "",
+    'table_number': 1,
+    'order_notes': "",
+    'payment_method': "cash",
+    'cart': {},  # uid -> cart item
+    'cart_total': 0.0,
+    'cart_count': 0,
+    'order_placed': False,
+    'order_id': None,
+    'order_token': None,
+    'device_type': None,
+    'kitchen_pages': 1,
+    'ready_celebrated_token': None
+}
+
+# Set by the track-order page; dropped once the customer leaves it
+TRACKING_SESSION_KEYS = ('tracking_token', 'track_order_input')
 
 # Initialize session state
 def init_session_state():
-    defaults = {
-        'logged_in': False,
-        'user': None,
-        'current_step': "order_type",
-        'order_type': "dine-in",
-        'customer_name': "",
-        'table_number': 1,
-        'order_notes': "",
-        'payment_method': "cash",
-        'cart': [],
-        'order_placed': False,
-        'order_id': None,
-        'order_token': None,
-        'current_order_status': None,
-        'last_order_check': time.time(),
-        'page': 'landing'
-    }
-    
-    for key, value in defaults.items():
-        if key not in st.session_state:
-            st.session_state[key] = value
+    # Every key is present after a session's first run
+    if '_session_initialized' in st.session_state:
+        return
+    for key, value in SESSION_DEFAULTS.items():
+        st.session_state.setdefault(key, copy.deepcopy(value))
+    st.session_state._session_initialized = True
+
+# Cart helpers keep the running total and item count in step with the cart;
+# each line's total is worked out once, when it is added
+def cart_add(cart_item):
+    cart_item['line_total'] = cart_item['price'] * cart_item['quantity']
+    st.session_state.cart[cart_item['uid']] = cart_item
+    st.session_state.cart_total += cart_item['line_total']
+    st.session_state.cart_count += cart_item['quantity']
+
+def cart_remove(uid):
+    item = st.session_state.cart.pop(uid)
+    st.session_state.cart_total -= item['line_total']
+    st.session_state.cart_count -= item['quantity']
+
+def cart_clear():
+    st.session_state.cart = {}
+    st.session_state.cart_total = 0.0
+    st.session_state.cart_count = 0
 
 # Enhanced CSS with beautiful styling
-def load_css():
-    st.markdown("""
+APP_CSS = """
     <style>
     /* Main Styles */
     .main-header {
@@ -956,7 +1392,7 @@ def load_css():
         left: 0;
         right: 0;
         bottom: 0;
-        background: url('https://images.unsplash.com/photo-1517248135467-4c7edcad34c4?w=1200&h=400&fit=crop') center/cover;
+        background: url('https://images.unsplash.com/photo-1517248135467-4c7edcad34c4?w=1200&h=400&fit=crop&auto=format&q=75') center/cover;
         opacity: 0.2;
         z-index: -1;
     }
@@ -1108,17 +1544,33 @@ def load_css():
     .fade-in {
         animation: fadeIn 0.5s ease-in-out;
     }
+    
+    /* Sidebar section divider */
+    .sb-section {
+        border-top: 1px solid #eee;
+        margin-top: 1rem;
+        padding-top: 1rem;
+    }
     </style>
-    """, unsafe_allow_html=True)
+    <link rel="preconnect" href="https://images.unsplash.com" crossorigin>
+    <link rel="dns-prefetch" href="https://images.unsplash.com">
+    """
+
+def minify_css(block):
+    """Strip comments and layout whitespace from an inline <style> block"""
+    block = re.sub(r'/\*.*?\*/', '', block, flags=re.S)
+    block = re.sub(r'\s*([{};,>])\s*', r'\1', block)
+    return re.sub(r'\s+', ' ', block).strip()
+
+# Streamlit resends every element on each rerun, so ship the styles compact
+APP_CSS = minify_css(APP_CSS)
+
+# Styles are emitted once per run from main(), not by every page
+def load_css():
+    st.markdown(APP_CSS, unsafe_allow_html=True)
 
 # Enhanced Customer Ordering Interface
 def customer_ordering():
-    if db is None:
-        st.error("Database not available. Please restart the application.")
-        return
-        
-    load_css()
-    
     st.markdown("""
     <div class="main-header">
         <h1 style="font-size: 3.5rem; margin-bottom: 1rem; background: linear-gradient(45deg, #FFD700, #FF6B35); -webkit-background-clip: text; -webkit-text-fill-color: transparent;">🍽️ Sanele Delights</h1>
@@ -1155,11 +1607,10 @@ def show_order_type_selection():
             <h3 style="color: #2E86AB;">Fine Dining</h3>
         </div>
         """, unsafe_allow_html=True)
-        st.image("https://images.unsplash.com/photo-1517248135467-4c7edcad34c4?w=400&h=250&fit=crop", use_container_width=True, caption="Elegant Restaurant Ambiance")
-        if st.button("**Reserve Table**", use_container_width=True, key="dine_in_btn"):
-            st.session_state.order_type = "dine-in"
-            st.session_state.current_step = "customer_info"
-            st.rerun()
+        st.markdown(image_figure("https://images.unsplash.com/photo-1517248135467-4c7edcad34c4?w=400&h=250&fit=crop&auto=format&q=75",
+                                 "Elegant Restaurant Ambiance", loading="eager"), unsafe_allow_html=True)
+        st.button("**Reserve Table**", use_container_width=True, key="dine_in_btn",
+                  on_click=go_to_step, args=("customer_info",), kwargs={'order_type': "dine-in"})
         st.caption("✨ Premium table service in our elegant restaurant")
     
     with col2:
@@ -1169,11 +1620,10 @@ def show_order_type_selection():
             <h3 style="color: #2E86AB;">Takeaway</h3>
         </div>
         """, unsafe_allow_html=True)
-        st.image("https://images.unsplash.com/photo-1565299624946-b28f40a0ae38?w=400&h=250&fit=crop", use_container_width=True, caption="Gourmet To-Go Packaging")
-        if st.button("**Order To-Go**", use_container_width=True, key="takeaway_btn"):
-            st.session_state.order_type = "takeaway"
-            st.session_state.current_step = "customer_info"
-            st.rerun()
+        st.markdown(image_figure("https://images.unsplash.com/photo-1565299624946-b28f40a0ae38?w=400&h=250&fit=crop&auto=format&q=75",
+                                 "Gourmet To-Go Packaging", loading="eager"), unsafe_allow_html=True)
+        st.button("**Order To-Go**", use_container_width=True, key="takeaway_btn",
+                  on_click=go_to_step, args=("customer_info",), kwargs={'order_type': "takeaway"})
         st.caption("🚀 Quick pickup of gourmet meals to enjoy elsewhere")
     
     with col3:
@@ -1183,11 +1633,10 @@ def show_order_type_selection():
             <h3 style="color: #2E86AB;">Premium Delivery</h3>
         </div>
         """, unsafe_allow_html=True)
-        st.image("https://images.unsplash.com/photo-1504674900247-0877df9cc836?w=400&h=250&fit=crop", use_container_width=True, caption="Professional Delivery Service")
-        if st.button("**Home Delivery**", use_container_width=True, key="delivery_btn"):
-            st.session_state.order_type = "delivery"
-            st.session_state.current_step = "customer_info"
-            st.rerun()
+        st.markdown(image_figure("https://images.unsplash.com/photo-1504674900247-0877df9cc836?w=400&h=250&fit=crop&auto=format&q=75",
+                                 "Professional Delivery Service", loading="eager"), unsafe_allow_html=True)
+        st.button("**Home Delivery**", use_container_width=True, key="delivery_btn",
+                  on_click=go_to_step, args=("customer_info",), kwargs={'order_type': "delivery"})
         st.caption("🏍️ Chef-prepared meals delivered to your doorstep")
 
 def show_customer_info():
@@ -1258,11 +1707,10 @@ def show_menu_selection():
     </div>
     """, unsafe_allow_html=True)
     
-    categories = ['All', 'Beverage', 'Starter', 'Main Course', 'Dessert']
-    selected_category = st.selectbox("**Filter by Category**", categories)
+    selected_category = st.selectbox("**Filter by Category**", MENU_CATEGORIES)
     
     try:
-        menu_items = db.get_menu_items(selected_category if selected_category != 'All' else None)
+        menu_items = cached_menu_items(selected_category if selected_category != 'All' else None)
     except Exception as e:
         st.error(f"Error loading menu: {e}")
         menu_items = []
@@ -1272,8 +1720,11 @@ def show_menu_selection():
         return
     
     # Determine device layout
-    device = st.session_state.get('device_type') or get_device_type()
-    st.session_state.device_type = device
+    # Detected once per session; the window size only arrives on a later run,
+    # so lay out for desktop until then instead of caching the guess
+    if st.session_state.device_type is None:
+        st.session_state.device_type = get_device_type()
+    device = st.session_state.device_type or 'desktop'
     cols_count = 1 if device == 'mobile' else (2 if device == 'tablet' else 3)
     image_height = 180 if device == 'mobile' else (220 if device == 'tablet' else 260)
     # Display menu items in a grid
@@ -1281,66 +1732,50 @@ def show_menu_selection():
     for idx, item in enumerate(menu_items):
         with cols[idx % cols_count]:
             with st.container():
-                st.markdown(f'<div class="menu-item-card">', unsafe_allow_html=True)
+                name = html.escape(item['name'])
                 
-                # Food image
-                try:
-                    img_path = item['image_url']
-                    if isinstance(img_path, str) and os.path.exists(img_path):
-                        with open(img_path, 'rb') as f:
-                            data = base64.b64encode(f.read()).decode('utf-8')
-                        st.markdown(
-                            f"""
-                            <div style="width:100%; height:{image_height}px; border-radius:15px; overflow:hidden;">
-                                <img src="data:image/jpeg;base64,{data}" style="width:100%; height:100%; object-fit:cover; display:block;" />
-                            </div>
-                            <div style="color:#aaa; margin-top:6px;">{item['name']}</div>
-                            """,
-                            unsafe_allow_html=True,
-                        )
-                    else:
-                        st.image(img_path, use_container_width=True, caption=item['name'])
-                except:
-                    st.markdown(f'''
-                    <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
-                                border-radius: 15px; height: {image_height}px; display: flex; align-items: center; justify-content: center; color: white;">
-                        <div style="text-align: center;">
-                            <div style="font-size: 3rem;">🍽️</div>
-                            <h3 style="color: white;">{item['name']}</h3>
-                        </div>
-                    </div>
-                    ''', unsafe_allow_html=True)
-                
-                # Item details
-                st.markdown(f"### {item['name']}")
-                st.markdown(f"_{item['description']}_")
+                # Food image, already resolved by cached_menu_items
+                image_src = item['image_src']
+                if image_src is None:
+                    image = (f'<div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); border-radius: 15px; height: {image_height}px; '
+                             f'display: flex; align-items: center; justify-content: center; color: white; font-size: 3rem;">🍽️</div>')
+                elif image_src.startswith('data:'):
+                    image = (f'<div style="width:100%; height:{image_height}px; border-radius:15px; overflow:hidden;">'
+                             f'<img src="{image_src}" alt="{name}" decoding="async" style="width:100%; height:100%; object-fit:cover; display:block;" /></div>')
+                else:
+                    # Let the browser defer fetching cards below the fold
+                    image = (f'<img src="{html.escape(image_src)}" alt="{name}" loading="lazy" fetchpriority="low" decoding="async" '
+                             f'style="width:100%; height:{image_height}px; object-fit:cover; border-radius:15px; display:block;" />')
                 
-                col_price, col_rating = st.columns([2, 1])
-                with col_price:
-                    st.markdown(f"**💰 R {item['price']}**")
-                with col_rating:
-                    st.markdown("⭐ 4.8")
+                # Image and item details in a single element
+                st.markdown(MENU_CARD_TEMPLATE.format(
+                    image=image,
+                    name=name,
+                    description=html.escape(item['description'] or ''),
+                    price=item['price'],
+                ), unsafe_allow_html=True)
                 
-                # Add to cart section
-                col_qty, col_inst, col_add = st.columns([1, 2, 1])
-                with col_qty:
-                    quantity = st.number_input("Qty", min_value=0, max_value=10, value=0, key=f"qty_{item['id']}")
-                with col_inst:
-                    instructions = st.text_input("Special requests", key=f"inst_{item['id']}", placeholder="e.g., no onions, extra sauce")
-                with col_add:
-                    if quantity > 0 and st.button("**+ Add**", key=f"add_{item['id']}", use_container_width=True):
+                # Add to cart section - a form so typing doesn't rerun the page
+                with st.form(f"add_{item['id']}", clear_on_submit=True, border=False):
+                    col_qty, col_inst, col_add = st.columns([1, 2, 1])
+                    with col_qty:
+                        quantity = st.number_input("Qty", min_value=0, max_value=10, value=0, key=f"qty_{item['id']}")
+                    with col_inst:
+                        instructions = st.text_input("Special requests", key=f"inst_{item['id']}", placeholder="e.g., no onions, extra sauce")
+                    with col_add:
+                        submitted = st.form_submit_button("**+ Add**", use_container_width=True)
+                    if submitted and quantity > 0:
                         cart_item = {
+                            'uid': uuid.uuid4().hex,
                             'id': item['id'],
                             'name': item['name'],
                             'price': item['price'],
                             'quantity': quantity,
                             'instructions': instructions
                         }
-                        st.session_state.cart.append(cart_item)
-                        st.success(f"✅ Added {quantity} x {item['name']}!")
+                        cart_add(cart_item)
+                        st.toast(f"✅ Added {quantity} x {item['name']}!")
                         st.rerun()
-                
-                st.markdown('</div>', unsafe_allow_html=True)
     
     show_cart_and_navigation()
 
@@ -1354,8 +1789,8 @@ def show_cart_and_navigation():
         </div>
         """, unsafe_allow_html=True)
         
-        total = 0
-        for i, item in enumerate(st.session_state.cart):
+        total = st.session_state.cart_total
+        for uid, item in st.session_state.cart.items():
             col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
             with col1:
                 st.write(f"**{item['name']}**")
@@ -1366,28 +1801,20 @@ def show_cart_and_navigation():
             with col3:
                 st.write(f"x{item['quantity']}")
             with col4:
-                if st.button("🗑️", key=f"remove_{i}"):
-                    st.session_state.cart.pop(i)
-                    st.rerun()
-            
-            total += item['price'] * item['quantity']
+                st.button("🗑️", key=f"remove_{uid}", on_click=cart_remove, args=(uid,))
         
         st.markdown(f"### 💰 Total Amount: R {total:.2f}")
         
         col1, col2 = st.columns(2)
         with col1:
-            if st.button("← Back to Details", use_container_width=True):
-                st.session_state.current_step = "customer_info"
-                st.rerun()
+            st.button("← Back to Details", use_container_width=True,
+                      on_click=go_to_step, args=("customer_info",))
         with col2:
-            if st.button("**📦 Proceed to Checkout**", type="primary", use_container_width=True):
-                st.session_state.current_step = "confirmation"
-                st.rerun()
+            st.button("**📦 Proceed to Checkout**", type="primary", use_container_width=True,
+                      on_click=go_to_step, args=("confirmation",))
     else:
         st.info("🛒 Your culinary journey awaits! Add some exquisite dishes from our menu above.")
-        if st.button("← Back to Personal Details"):
-            st.session_state.current_step = "customer_info"
-            st.rerun()
+        st.button("← Back to Personal Details", on_click=go_to_step, args=("customer_info",))
 
 def show_order_confirmation():
     st.markdown("""
@@ -1399,9 +1826,7 @@ def show_order_confirmation():
     
     if not st.session_state.cart:
         st.error(" Your cart is empty. Please add items before placing an order.")
-        if st.button("← Back to Menu"):
-            st.session_state.current_step = "menu"
-            st.rerun()
+        st.button("← Back to Menu", on_click=go_to_step, args=("menu",))
         return
     
     with st.container():
@@ -1411,28 +1836,31 @@ def show_order_confirmation():
         col1, col2 = st.columns(2)
         
         with col1:
-            st.markdown("### 👤 Customer Details")
-            st.write(f"**Name:** {st.session_state.customer_name}")
-            st.write(f"**Experience:** {st.session_state.order_type.title()}")
-            st.write(f"**Payment:** {st.session_state.payment_method.title()}")
+            st.markdown("\n\n".join([
+                "### 👤 Customer Details",
+                f"**Name:** {st.session_state.customer_name}",
+                f"**Experience:** {st.session_state.order_type.title()}",
+                f"**Payment:** {st.session_state.payment_method.title()}",
+            ]))
         
         with col2:
-            st.markdown("### ⚙️ Order Settings")
+            settings = ["### ⚙️ Order Settings"]
             if st.session_state.order_type == "dine-in":
-                st.write(f"**Table:** {st.session_state.table_number}")
+                settings.append(f"**Table:** {st.session_state.table_number}")
             if st.session_state.order_notes:
-                st.write(f"**Special Requests:** {st.session_state.order_notes}")
-        
-        st.markdown("### 🍽️ Selected Items")
-        total = 0
-        item_count = 0
-        for item in st.session_state.cart:
-            item_total = item['price'] * item['quantity']
-            total += item_total
-            item_count += item['quantity']
-            st.write(f"• **{item['quantity']}x {item['name']}** - R {item_total:.2f}")
+                settings.append(f"**Special Requests:** {st.session_state.order_notes}")
+            st.markdown("\n\n".join(settings))
+        
+        total = st.session_state.cart_total
+        item_count = st.session_state.cart_count
+        # The whole item list as one markdown element
+        lines = ["### 🍽️ Selected Items"]
+        for item in st.session_state.cart.values():
+            line = f"- **{item['quantity']}x {item['name']}** - R {item['line_total']:.2f}"
             if item['instructions']:
-                st.caption(f"  _📝 {item['instructions']}_")
+                line += f"  \n  _📝 {item['instructions']}_"
+            lines.append(line)
+        st.markdown("\n".join(lines))
         
         st.markdown(f"### 💰 **Total Amount: R {total:.2f}**")
         st.markdown(f"**📦 Total Items: {item_count}**")
@@ -1442,9 +1870,8 @@ def show_order_confirmation():
     st.markdown("---")
     col1, col2 = st.columns(2)
     with col1:
-        if st.button("← Back to Menu", use_container_width=True):
-            st.session_state.current_step = "menu"
-            st.rerun()
+        st.button("← Back to Menu", use_container_width=True,
+                  on_click=go_to_step, args=("menu",))
     with col2:
         if st.button("**🚀 Confirm & Place Order**", type="primary", use_container_width=True):
             try:
@@ -1453,7 +1880,7 @@ def show_order_confirmation():
                 order_id, order_token = db.add_order(
                     st.session_state.customer_name,
                     st.session_state.order_type,
-                    st.session_state.cart,
+                    list(st.session_state.cart.values()),
                     st.session_state.table_number,
                     st.session_state.order_notes,
                     st.session_state.payment_method
@@ -1463,15 +1890,12 @@ def show_order_confirmation():
                     st.session_state.order_placed = True
                     st.session_state.order_id = order_id
                     st.session_state.order_token = order_token
-                    st.session_state.current_order_status = 'pending'
-                    st.session_state.cart = []
+                    cart_clear()
                     st.session_state.current_step = "tracking"
                     
-                    st.success(f"🎉 Order placed successfully!")
-                    st.success(f"**Your Order Token:** {order_token}")
-                    st.info("📱 Save this token to track your order status")
-                    st.balloons()
-                    time.sleep(2)
+                    # Toasts survive the rerun, so no need to hold the script open
+                    st.toast(f"🎉 Order placed successfully! Token: {order_token}")
+                    st.toast("📱 Save this token to track your order status")
                     st.rerun()
                 else:
                     st.error(" Failed to create order. Please try again.")
@@ -1481,8 +1905,6 @@ def show_order_confirmation():
                 st.error("Please try again or contact our concierge for assistance.")
 
 def track_order():
-    load_css()
-    
     st.markdown("""
     <div class="tracking-header">
         <h1 style="font-size: 3rem; margin-bottom: 1rem;">📱 Live Order Tracking</h1>
@@ -1491,99 +1913,89 @@ def track_order():
     """, unsafe_allow_html=True)
     
     # Check if we have an active order from ordering flow
-    if st.session_state.get('order_placed') and st.session_state.get('order_token'):
-        order_token = st.session_state.order_token
-        display_order_tracking(order_token)
-    else:
-        # Allow manual order token entry
-        st.markdown("""
-        <div style="text-align: center; background: white; padding: 2rem; border-radius: 20px; box-shadow: 0 5px 15px rgba(0,0,0,0.1); margin-bottom: 2rem;">
-            <h3 style="color: #2E86AB;">🔍 Track Your Order</h3>
-            <p>Enter your order token to view real-time status updates</p>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        order_token = st.text_input(
-            "**Order Token**", 
-            placeholder="ORD123456789",
-            key="track_order_input"
-        )
-        
-        col1, col2 = st.columns([3, 1])
-        with col1:
-            if st.button("**🔍 Track Order**", type="primary", use_container_width=True):
-                if order_token:
-                    if order_token.startswith("ORD") and len(order_token) > 3:
-                        display_order_tracking(order_token)
-                    else:
-                        st.error(" Invalid Order Token format. It should start with 'ORD' followed by numbers.")
-                else:
-                    st.error(" Please enter your order token")
-        
-        with col2:
-            if st.button("**🔄 Demo Order**", use_container_width=True):
-                # Create a demo order
-                try:
-                    demo_items = [
-                        {'id': 1, 'name': 'Wagyu Beef Burger', 'price': 185, 'quantity': 1, 'instructions': 'Medium rare'},
-                        {'id': 13, 'name': 'Chocolate Lava Cake', 'price': 85, 'quantity': 2, 'instructions': 'Extra ice cream'}
-                    ]
-                    demo_order_id, demo_order_token = db.add_order(
-                        "Demo Customer",
-                        "dine-in",
-                        demo_items,
-                        5,
-                        "Demo order for tracking",
-                        "card"
-                    )
-                    st.session_state.tracking_token = demo_order_token
-                    st.success(f"🎉 Demo order created! Token: {demo_order_token}")
-                    st.rerun()
-                except Exception as e:
-                    st.error(f" Error creating demo order: {e}")
+    if st.session_state.order_placed and st.session_state.order_token:
+        display_order_tracking(st.session_state.order_token)
+        return
+    
+    # Allow manual order token entry
+    st.markdown("""
+    <div style="text-align: center; background: white; padding: 2rem; border-radius: 20px; box-shadow: 0 5px 15px rgba(0,0,0,0.1); margin-bottom: 2rem;">
+        <h3 style="color: #2E86AB;">🔍 Track Your Order</h3>
+        <p>Enter your order token to view real-time status updates</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    order_token = st.text_input(
+        "**Order Token**", 
+        placeholder="ORD123456789",
+        key="track_order_input"
+    )
+    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        track_clicked = st.button("**🔍 Track Order**", type="primary", use_container_width=True)
+    
+    with col2:
+        if st.button("**🔄 Demo Order**", use_container_width=True):
+            # Create a demo order
+            try:
+                demo_items = [
+                    {'id': 1, 'name': 'Wagyu Beef Burger', 'price': 185, 'quantity': 1, 'instructions': 'Medium rare'},
+                    {'id': 13, 'name': 'Chocolate Lava Cake', 'price': 85, 'quantity': 2, 'instructions': 'Extra ice cream'}
+                ]
+                demo_order_id, demo_order_token = db.add_order(
+                    "Demo Customer",
+                    "dine-in",
+                    demo_items,
+                    5,
+                    "Demo order for tracking",
+                    "card"
+                )
+                st.session_state.tracking_token = demo_order_token
+                st.toast(f"🎉 Demo order created! Token: {demo_order_token}")
+                st.rerun()
+            except Exception as e:
+                st.error(f" Error creating demo order: {e}")
+    
+    # One tracking path for a typed token and a freshly created demo order
+    if track_clicked:
+        if not order_token:
+            st.error(" Please enter your order token")
+            return
+        st.session_state.tracking_token = order_token.strip()
+    
+    if st.session_state.get('tracking_token'):
+        display_order_tracking(st.session_state.tracking_token)
 
 def display_order_tracking(order_token):
     """Enhanced order tracking with beautiful UI"""
-    if db is None:
-        st.error(" Database not available")
+    # Reject malformed tokens before they reach the database
+    if not (isinstance(order_token, str) and order_token.startswith("ORD")
+            and len(order_token) > 3 and order_token[3:].isdigit()):
+        st.error(" Invalid Order Token format. It should start with 'ORD' followed by numbers.")
         return
         
     st.info(f"🔍 Tracking order with token: **{order_token}**")
     
-    # Get current order status
-    current_status = db.get_order_status(order_token)
-    
-    if current_status is None:
-        st.error(f" Order not found with token: {order_token}")
-        return
-    
-    # Get full order details
-    order = db.get_order_by_token(order_token)
+    # Items, totals and customer details don't change once the order is placed
+    order = cached_order_by_token(order_token)
     
     if not order:
-        st.error(" Could not load order details")
+        st.error(f" Order not found with token: {order_token}")
         return
     
-    # Status configuration with beautiful styling
-    status_config = {
-        'pending':   { 'color': '#FF6B35', 'name': 'Order Received',      'description': 'We have received your order and our chefs are preparing',           'emoji': '📥'},
-        'preparing': { 'color': '#2E86AB', 'name': 'In Preparation',      'description': 'Our master chefs are crafting your culinary experience',             'emoji': '👨‍🍳'},
-        'ready':     { 'color': '#28A745', 'name': 'Ready for Service',    'description': 'Your gourmet meal is ready! Get ready to indulge',                 'emoji': '✅'},
-        'completed': { 'color': '#008000', 'name': 'Experience Complete',  'description': 'Thank you for dining with us! We hope you enjoyed',                 'emoji': '🎉'},
-        'collected': { 'color': '#4B0082', 'name': 'Order Collected',      'description': 'Your takeaway order has been collected',                            'emoji': '📦'}
-    }
-    
-    current_status_info = status_config.get(current_status, status_config['pending'])
+    live_order_status(order)
+
+# Only this block reruns on each poll, not the whole page
+@st.fragment(run_every=5)
+def live_order_status(order):
+    """Status header, order details and progress for a tracked order"""
+    # A poll only needs the status; the rest of the order was loaded with the page
+    order_token = order['order_token']
+    current_status = cached_order_status(order_token) or order['status']
     
     # Display beautiful status header
-    st.markdown(f"""
-    <div style="background: linear-gradient(135deg, {current_status_info['color']} 0%, {current_status_info['color']}80 100%); 
-                color: white; padding: 3rem 2rem; border-radius: 25px; text-align: center; margin-bottom: 2rem; box-shadow: 0 10px 30px rgba(0,0,0,0.2);">
-        <h1 style="margin: 0; font-size: 4rem;">{current_status_info['emoji']}</h1>
-        <h2 style="margin: 15px 0; color: white; font-size: 2.5rem;">{current_status_info['name']}</h2>
-        <p style="margin: 0; font-size: 1.3rem; opacity: 0.9;">{current_status_info['description']}</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(STATUS_HEADER_HTML.get(current_status, STATUS_HEADER_HTML['pending']), unsafe_allow_html=True)
     
     # Order details in a beautiful card
     st.markdown("""
@@ -1593,20 +2005,26 @@ def display_order_tracking(order_token):
     
     col1, col2 = st.columns(2)
     
+    # One markdown element per column keeps each poll's message small
     with col1:
-        st.markdown("**🎯 Order Information**")
-        st.write(f"**Order ID:** #{order[0]}")
-        st.write(f"**Customer:** {order[2]}")
-        st.write(f"**Service Type:** {order[3].title()}")
-        st.write(f"**Payment:** {order[10].title()}")
+        st.markdown("\n\n".join([
+            "**🎯 Order Information**",
+            f"**Order ID:** #{order['id']}",
+            f"**Customer:** {order['customer_name']}",
+            f"**Service Type:** {order['order_type'].title()}",
+            f"**Payment:** {order['payment_method'].title()}",
+        ]))
     
     with col2:
-        st.markdown("**💰 Order Summary**")
-        st.write(f"**Total Amount:** R {order[5]:.2f}")
-        st.write(f"**Order Date:** {order[6]}")
-        st.write(f"**Items Ordered:** {order[11]}")
-        if order[7]:
-            st.write(f"**Special Notes:** {order[7]}")
+        summary = [
+            "**💰 Order Summary**",
+            f"**Total Amount:** R {order['total_amount']:.2f}",
+            f"**Order Date:** {order['order_date']}",
+            f"**Items Ordered:** {order['items']}",
+        ]
+        if order['notes']:
+            summary.append(f"**Special Notes:** {order['notes']}")
+        st.markdown("\n\n".join(summary))
     
     st.markdown("</div>", unsafe_allow_html=True)
     
@@ -1616,18 +2034,9 @@ def display_order_tracking(order_token):
         <h3 style="color: #2E86AB; margin-bottom: 1.5rem;">🔄 Order Journey</h3>
     """, unsafe_allow_html=True)
     
-    # Define status flow based on order type
-    order_type = order[3]
-    if order_type == 'takeaway':
-        status_flow = ['pending', 'preparing', 'ready', 'collected']
-        status_names = ['Order Received', 'In Preparation', 'Ready for Collection', 'Collected']
-        status_icons = ['📥', '👨‍🍳', '✅', '📦']
-    else:
-        status_flow = ['pending', 'preparing', 'ready', 'completed']
-        status_names = ['Order Received', 'In Preparation', 'Ready to Serve', 'Experience Complete']
-        status_icons = ['📥', '👨‍🍳', '🍽️', '🎉']
-    
-    current_index = status_flow.index(current_status) if current_status in status_flow else 0
+    # Status flow based on order type
+    status_flow = TAKEAWAY_FLOW if order['order_type'] == 'takeaway' else DINEIN_FLOW
+    current_index = FLOW_INDEX[status_flow].get(current_status, 0)
     
     # Progress bar
     progress = current_index / (len(status_flow) - 1) if len(status_flow) > 1 else 0
@@ -1642,8 +2051,8 @@ def display_order_tracking(order_token):
     
     # Beautiful status steps
     cols = st.columns(len(status_flow))
-    for i, (status, status_name, icon) in enumerate(zip(status_flow, status_names, status_icons)):
-        status_info = status_config.get(status, status_config['pending'])
+    for i, (status, status_name, icon) in enumerate(status_flow):
+        status_info = STATUS_CONFIG.get(status, STATUS_CONFIG['pending'])
         
         with cols[i]:
             if i < current_index:
@@ -1671,9 +2080,11 @@ def display_order_tracking(order_token):
                 # Show estimated time for current step
                 if status == 'preparing':
                     st.info("⏱️ **Estimated preparation time: 15-20 minutes**")
-                elif status == 'ready':
+                elif status == 'ready' and st.session_state.ready_celebrated_token != order_token:
+                    # Celebrate once per order, not on every poll
                     st.success("🎉 **Your gourmet experience is ready!**")
                     st.balloons()
+                    st.session_state.ready_celebrated_token = order_token
             else:
                 # Future step
                 st.markdown(f"""
@@ -1695,21 +2106,11 @@ def display_order_tracking(order_token):
             st.info("🔄 **Live Tracking Active** - Status updates automatically every 5 seconds")
             st.write(f"**Last checked:** {get_sa_time().strftime('%H:%M:%S')} SAST")
         with refresh_col2:
-            if st.button("🔄 Refresh Now", use_container_width=True):
-                st.rerun()
-        
-        # Auto-refresh every 5 seconds
-        time.sleep(5)
-        st.rerun()
+            # Clicking reruns this fragment
+            st.button("🔄 Refresh Now", use_container_width=True)
 
 # Enhanced Kitchen Dashboard
 def kitchen_dashboard():
-    if db is None:
-        st.error("❌ Database not available")
-        return
-        
-    load_css()
-    
     st.markdown("""
     <div class="main-header">
         <h1 style="font-size: 3rem; margin-bottom: 1rem;"> Chef's Command Center</h1>
@@ -1717,29 +2118,38 @@ def kitchen_dashboard():
     </div>
     """, unsafe_allow_html=True)
     
-    # Kitchen overview image
-    st.image("https://images.unsplash.com/photo-1556909114-f6e7ad7d3136?w=1000&h=400&fit=crop", 
-             use_container_width=True, caption="State-of-the-Art Kitchen")
+    # Kitchen overview image (above the fold, so fetch it eagerly)
+    st.markdown(image_figure("https://images.unsplash.com/photo-1556909114-f6e7ad7d3136?w=1000&h=400&fit=crop&auto=format&q=75",
+                             "State-of-the-Art Kitchen", loading="eager", radius=20), unsafe_allow_html=True)
     
+    kitchen_orders_board()
+
+# Buttons in here rerun only the board, not the header and hero image
+@st.fragment
+def kitchen_orders_board():
+    """Kitchen metrics and per-status order tabs"""
     if st.button("🔄 Refresh Orders", use_container_width=True):
-        st.rerun()
+        clear_order_caches()
+    
+    # Load active orders once for the metrics and every tab
+    pages = st.session_state.kitchen_pages
+    orders = load_active_orders(pages=pages)
     
     # Kitchen metrics
     try:
-        orders = db.get_active_orders()
-        pending_orders = len([o for o in orders if o['status'] == 'pending'])
-        preparing_orders = len([o for o in orders if o['status'] == 'preparing'])
-        ready_orders = len([o for o in orders if o['status'] == 'ready'])
+        metrics = cached_kitchen_metrics()
+        pending_orders = metrics['pending']
+        preparing_orders = metrics['preparing']
+        ready_orders = metrics['ready']
         
         # Calculate kitchen efficiency
-        completed_today = db.get_orders_completed_today()
-        avg_prep_time = db.get_average_preparation_time()
+        completed_today = metrics['completed_today']
+        avg_prep_time = float(metrics['avg_prep_time'])
         
     except:
         pending_orders = preparing_orders = ready_orders = 0
         completed_today = 0
         avg_prep_time = 0
-        orders = []
     
     # Enhanced metrics with performance indicators
     metrics_cols = st.columns(4)
@@ -1781,26 +2191,35 @@ def kitchen_dashboard():
         </div>
         """, unsafe_allow_html=True)
     
+    # Bucket orders by status for the tabs
+    buckets = {status: [] for status in KITCHEN_STATUSES}
+    for order in orders:
+        if order['status'] in buckets:
+            buckets[order['status']].append(order)
+    
     # Order management tabs
     tab1, tab2, tab3, tab4 = st.tabs([f"⏳ Pending ({pending_orders})", f"👨‍🍳 Preparing ({preparing_orders})", f"✅ Ready ({ready_orders})", "📊 Performance"])
     
     with tab1:
-        display_kitchen_orders(orders, 'pending')
+        display_kitchen_orders(buckets['pending'], 'pending')
     with tab2:
-        display_kitchen_orders(orders, 'preparing')
+        display_kitchen_orders(buckets['preparing'], 'preparing')
     with tab3:
-        display_kitchen_orders(orders, 'ready')
+        display_kitchen_orders(buckets['ready'], 'ready')
     with tab4:
         display_kitchen_performance()
-
-def display_kitchen_orders(orders, status):
-    filtered_orders = [order for order in orders if order['status'] == status]
     
-    if not filtered_orders:
+    if len(orders) >= pages * ACTIVE_ORDERS_PAGE_SIZE:
+        if st.button("⬇️ Load Older Orders", use_container_width=True):
+            st.session_state.kitchen_pages = pages + 1
+            st.rerun(scope="fragment")
+
+def display_kitchen_orders(orders_for_status, status):
+    if not orders_for_status:
         st.info(f" No {status} orders - Kitchen is clear!")
         return
     
-    for order in filtered_orders:
+    for order in orders_for_status:
         status_class = f"status-{status}"
         with st.container():
             st.markdown(f'<div class="order-card {status_class}">', unsafe_allow_html=True)
@@ -1810,7 +2229,7 @@ def display_kitchen_orders(orders, status):
             with col1:
                 st.markdown(f"### 🎯 Order #{order['id']} - {order['customer_name']}")
                 st.markdown(f"**Service Type:** {order['order_type'].title()} | **Table:** {order['table_number'] or 'N/A'}")
-                st.markdown(f"**📦 Items:** {order['items']}")
+                st.markdown(f"**📦 Items:** {order['items_text']}")
                 if order['notes']:
                     st.markdown(f"**📝 Notes:** {order['notes']}")
                 st.markdown(f"**🕒 Order Time:** {order['order_date']}")
@@ -1819,34 +2238,47 @@ def display_kitchen_orders(orders, status):
             with col2:
                 if status == 'pending':
                     if st.button("Start Preparation", key=f"start_{order['id']}", use_container_width=True):
+                        # Written straight away so customers and other staff see it
                         if db.update_order_status(order['id'], 'preparing', 'Chef started preparation'):
-                            st.success("✅ Order preparation started!")
-                            time.sleep(1)
-                            st.rerun()
+                            st.toast("✅ Order preparation started!")
+                            st.rerun(scope="fragment")
                 elif status == 'preparing':
                     if st.button("Mark as Ready", key=f"ready_{order['id']}", use_container_width=True):
                         if db.update_order_status(order['id'], 'ready', 'Order ready for service'):
-                            st.success("🎉 Order marked as ready!")
-                            time.sleep(1)
-                            st.rerun()
+                            st.toast("🎉 Order marked as ready!")
+                            st.rerun(scope="fragment")
                 elif status == 'ready':
                     new_status = 'collected' if order['order_type'] == 'takeaway' else 'completed'
                     status_text = 'Mark Collected' if order['order_type'] == 'takeaway' else 'Complete Service'
                     if st.button(status_text, key=f"complete_{order['id']}", use_container_width=True):
                         if db.update_order_status(order['id'], new_status, 'Order completed by kitchen'):
-                            st.success(f"✅ Order {new_status}!")
-                            time.sleep(1)
-                            st.rerun()
+                            st.toast(f"✅ Order {new_status}!")
+                            st.rerun(scope="fragment")
             
             st.markdown('</div>', unsafe_allow_html=True)
 
+def records_frame(rows, dtypes):
+    """Build a DataFrame column by column from query rows with fixed dtypes"""
+    import pandas as pd
+    return pd.DataFrame({column: [row[column] for row in rows] for column in dtypes}).astype(dtypes)
+
+def ratio_colors(values, palette):
+    """One of four colours per value by its share of the column max (40/60/80% bands)"""
+    import pandas as pd
+    peak = values.max()
+    if not peak > 0:
+        return [palette[0]] * len(values)
+    return pd.cut(values / peak, [-float('inf'), 0.4, 0.6, 0.8, float('inf')],
+                  labels=palette).astype(object).fillna(palette[0]).tolist()
+
 def display_kitchen_performance():
     """Display real-time kitchen performance metrics"""
+    import plotly.express as px
     
     st.markdown("## 🎯 Kitchen Performance Analytics")
     
     # Get popular menu items based on actual orders
-    popular_items = db.get_popular_menu_items(7)
+    popular_items = cached_popular_menu_items(7)
     
     if not popular_items:
         st.warning("No kitchen performance data available yet. Data will appear after orders are completed.")
@@ -1858,8 +2290,7 @@ def display_kitchen_performance():
     with col1:
         # Popular items chart based on real data
         if popular_items:
-            # Convert to DataFrame with proper column names
-            df_popular = pd.DataFrame([dict(item) for item in popular_items])
+            df_popular = records_frame(popular_items, {'name': 'object', 'times_ordered': 'int64'})
             fig = px.bar(df_popular.head(8), x='name', y='times_ordered',
                         title='Most Ordered Items (Last 7 Days)',
                         labels={'name': 'Menu Item', 'times_ordered': 'Number of Orders'})
@@ -1897,7 +2328,7 @@ def display_kitchen_performance():
             """)
     
     with alert_col2:
-        total_orders_today = db.get_orders_completed_today()
+        total_orders_today = cached_orders_completed_today()
         if total_orders_today > 15:
             st.success(f"""
             **Busy Day!**
@@ -1915,12 +2346,6 @@ def display_kitchen_performance():
 
 # Enhanced Analytics Dashboard with Real Metrics
 def analytics_dashboard():
-    if db is None:
-        st.error("Database not available")
-        return
-        
-    load_css()
-    
     st.markdown("""
     <div class="main-header">
         <h1 style="font-size: 3rem; margin-bottom: 1rem;">📊 Advanced Business Intelligence</h1>
@@ -1962,10 +2387,12 @@ def analytics_dashboard():
         display_recommendations()
 
 def display_overview_analytics(days=30):
+    import plotly.express as px
+    
     st.markdown("## 📊 Business Overview")
     
     # Get analytics data
-    sales_data = db.get_sales_analytics(days)
+    sales_data = cached_sales_analytics(days)
     
     if not sales_data:
         st.warning("No data available for the selected period. Analytics will appear after orders are completed.")
@@ -1991,17 +2418,12 @@ def display_overview_analytics(days=30):
     # Revenue Trend Chart - FIXED: Proper DataFrame creation
     st.markdown("### 📈 Revenue Trend")
     if sales_data['daily_sales']:
-        # Convert to proper DataFrame with column names
-        daily_data = []
-        for row in sales_data['daily_sales']:
-            daily_data.append({
-                'date': row['date'],
-                'order_count': row['order_count'],
-                'revenue': row['revenue'],
-                'avg_order_value': row['avg_order_value']
-            })
-        
-        df_daily = pd.DataFrame(daily_data)
+        df_daily = records_frame(sales_data['daily_sales'], {
+            'date': 'object',
+            'order_count': 'int64',
+            'revenue': 'float64',
+            'avg_order_value': 'float64'
+        })
         
         if not df_daily.empty:
             fig = px.line(df_daily, x='date', y='revenue', 
@@ -2020,17 +2442,12 @@ def display_overview_analytics(days=30):
     
     with col1:
         if sales_data['category_performance']:
-            # Convert to proper DataFrame with column names
-            category_data = []
-            for row in sales_data['category_performance']:
-                category_data.append({
-                    'category': row['category'],
-                    'items_sold': row['items_sold'],
-                    'revenue': row['revenue'],
-                    'profit': row['profit']
-                })
-            
-            df_cat = pd.DataFrame(category_data)
+            df_cat = records_frame(sales_data['category_performance'], {
+                'category': 'object',
+                'items_sold': 'int64',
+                'revenue': 'float64',
+                'profit': 'float64'
+            })
             
             if not df_cat.empty:
                 fig = px.pie(df_cat, values='revenue', names='category',
@@ -2043,15 +2460,10 @@ def display_overview_analytics(days=30):
     
     with col2:
         if sales_data['hourly_distribution']:
-            # Convert to proper DataFrame with column names
-            hourly_data = []
-            for row in sales_data['hourly_distribution']:
-                hourly_data.append({
-                    'hour': row['hour'],
-                    'order_count': row['order_count']
-                })
-            
-            df_hourly = pd.DataFrame(hourly_data)
+            df_hourly = records_frame(sales_data['hourly_distribution'], {
+                'hour': 'object',
+                'order_count': 'int64'
+            })
             
             if not df_hourly.empty:
                 fig = px.bar(df_hourly, x='hour', y='order_count',
@@ -2065,9 +2477,13 @@ def display_overview_analytics(days=30):
 
 # Update the display_financial_analytics function with color-coded bars
 def display_financial_analytics(days=30):
+    import pandas as pd
+    import plotly.express as px
+    import plotly.graph_objects as go
+    
     st.markdown("## 💰 Financial Analytics")
     
-    financial_data = db.get_financial_metrics(days)
+    financial_data = cached_financial_metrics(days)
     
     if not financial_data:
         st.warning("No financial data available yet. Data will appear after orders are completed.")
@@ -2094,16 +2510,11 @@ def display_financial_analytics(days=30):
     # Profit Trend - FIXED: Proper DataFrame creation
     st.markdown("### 💹 Profit vs Revenue")
     if financial_data['financial_trends']:
-        # Convert to proper DataFrame with column names
-        trend_data = []
-        for row in financial_data['financial_trends']:
-            trend_data.append({
-                'date': row['date'],
-                'revenue': row['revenue'],
-                'profit': row['profit']
-            })
-        
-        df_fin = pd.DataFrame(trend_data)
+        df_fin = records_frame(financial_data['financial_trends'], {
+            'date': 'object',
+            'revenue': 'float64',
+            'profit': 'float64'
+        })
         
         if not df_fin.empty:
             fig = go.Figure()
@@ -2126,36 +2537,25 @@ def display_financial_analytics(days=30):
     # Menu Item Profitability - ENHANCED: Color-coded bars
     st.markdown("### 🏆 Most Profitable Items")
     if financial_data['profitability']:
-        # Convert to proper DataFrame with column names
-        profit_data = []
-        for row in financial_data['profitability']:
-            profit_data.append({
-                'name': row['name'],
-                'category': row['category'],
-                'times_ordered': row['times_ordered'],
-                'revenue': row['revenue'],
-                'cost': row['cost'],
-                'profit': row['profit'],
-                'margin_percent': row['margin_percent']
-            })
-        
-        df_profit = pd.DataFrame(profit_data).head(10)
+        df_profit = records_frame(financial_data['profitability'], {
+            'name': 'object',
+            'category': 'object',
+            'times_ordered': 'int64',
+            'revenue': 'float64',
+            'cost': 'float64',
+            'profit': 'float64',
+            'margin_percent': 'float64'
+        }).head(10)
         
         if not df_profit.empty:
             # Create color scale based on profit margin
             df_profit = df_profit.sort_values('profit', ascending=True)  # Sort for better visualization
             
             # Color mapping based on margin percentage
-            colors = []
-            for margin in df_profit['margin_percent']:
-                if margin > 70:
-                    colors.append('#2ecc71')  # High profit - Green
-                elif margin > 50:
-                    colors.append('#3498db')  # Good profit - Blue
-                elif margin > 30:
-                    colors.append('#f39c12')  # Medium profit - Orange
-                else:
-                    colors.append('#e74c3c')  # Low profit - Red
+            # Low (red), medium (orange), good (blue) and high (green) profit bands
+            colors = pd.cut(df_profit['margin_percent'], [-float('inf'), 30, 50, 70, float('inf')],
+                            labels=['#e74c3c', '#f39c12', '#3498db', '#2ecc71']
+                            ).astype(object).fillna('#e74c3c').tolist()
             
             fig = go.Figure(go.Bar(
                 y=df_profit['name'],
@@ -2233,33 +2633,19 @@ def display_financial_analytics(days=30):
     # Payment Method Analysis - ENHANCED: Color-coded bars
     st.markdown("### 💳 Payment Method Performance")
     if financial_data['payment_analysis']:
-        # Convert to proper DataFrame with column names
-        payment_data = []
-        for row in financial_data['payment_analysis']:
-            payment_data.append({
-                'payment_method': row['payment_method'],
-                'transaction_count': row['transaction_count'],
-                'total_amount': row['total_amount'],
-                'avg_transaction': row['avg_transaction']
-            })
-        
-        df_payment = pd.DataFrame(payment_data)
+        df_payment = records_frame(financial_data['payment_analysis'], {
+            'payment_method': 'object',
+            'transaction_count': 'int64',
+            'total_amount': 'float64',
+            'avg_transaction': 'float64'
+        })
         
         if not df_payment.empty:
             col1, col2 = st.columns(2)
             
             with col1:
-                # Color scheme for payment methods
-                payment_colors = {
-                    'cash': '#27ae60',
-                    'card': '#3498db', 
-                    'credit': '#9b59b6',
-                    'mobile': '#e67e22',
-                    'vip': '#e74c3c'
-                }
-                
                 # Assign colors based on payment method
-                colors = [payment_colors.get(method.lower(), '#95a5a6') for method in df_payment['payment_method']]
+                colors = [PAYMENT_COLORS.get(method.lower(), '#95a5a6') for method in df_payment['payment_method']]
                 
                 fig_pie = px.pie(df_payment, values='total_amount', names='payment_method',
                                 title='Revenue Distribution by Payment Method',
@@ -2277,21 +2663,9 @@ def display_financial_analytics(days=30):
                 st.plotly_chart(fig_pie, use_container_width=True)
             
             with col2:
-                # Color bars by average transaction value
-                avg_transaction_colors = []
-                max_avg = df_payment['avg_transaction'].max()
-                
-                for avg in df_payment['avg_transaction']:
-                    # Create gradient from blue to purple based on value
-                    ratio = avg / max_avg if max_avg > 0 else 0
-                    if ratio > 0.8:
-                        avg_transaction_colors.append('#8e44ad')  # High - Purple
-                    elif ratio > 0.6:
-                        avg_transaction_colors.append('#3498db')  # Medium-High - Blue
-                    elif ratio > 0.4:
-                        avg_transaction_colors.append('#1abc9c')  # Medium - Teal
-                    else:
-                        avg_transaction_colors.append('#2ecc71')  # Low - Green
+                # Color bars by average transaction value, green (low) to purple (high)
+                avg_transaction_colors = ratio_colors(df_payment['avg_transaction'],
+                                                      ['#2ecc71', '#1abc9c', '#3498db', '#8e44ad'])
                 
                 fig_bar = go.Figure(go.Bar(
                     x=df_payment['payment_method'],
@@ -2328,10 +2702,12 @@ def display_financial_analytics(days=30):
 
 # Update the display_kitchen_analytics function with color-coded bars
 def display_kitchen_analytics(days=7):
+    import plotly.graph_objects as go
+    
     st.markdown("## 👨‍🍳 Kitchen Performance")
     
     # Get popular menu items based on actual orders
-    popular_items = db.get_popular_menu_items(days)
+    popular_items = cached_popular_menu_items(days)
     
     if not popular_items:
         st.warning("No kitchen performance data available yet. Data will appear after orders are completed.")
@@ -2357,37 +2733,21 @@ def display_kitchen_analytics(days=7):
     # Popular Items Analysis - ENHANCED: Color-coded bars
     st.markdown("### 🏆 Most Popular Menu Items")
     if popular_items:
-        # Convert to proper DataFrame with column names
-        popular_data = []
-        for item in popular_items:
-            popular_data.append({
-                'name': item['name'],
-                'times_ordered': item['times_ordered'],
-                'total_quantity': item['total_quantity'],
-                'total_revenue': item['total_revenue'],
-                'avg_price': item['avg_price']
-            })
-        
-        df_popular = pd.DataFrame(popular_data)
+        df_popular = records_frame(popular_items, {
+            'name': 'object',
+            'times_ordered': 'int64',
+            'total_quantity': 'float64',
+            'total_revenue': 'float64',
+            'avg_price': 'float64'
+        })
         
         if not df_popular.empty:
             col1, col2 = st.columns(2)
             
             with col1:
                 # Color by order frequency - gradient from light to dark blue
-                max_orders = df_popular['times_ordered'].max()
-                colors = []
-                for orders in df_popular['times_ordered']:
-                    ratio = orders / max_orders if max_orders > 0 else 0
-                    # Create blue gradient
-                    if ratio > 0.8:
-                        colors.append('#2980b9')  # Dark blue
-                    elif ratio > 0.6:
-                        colors.append('#3498db')  # Blue
-                    elif ratio > 0.4:
-                        colors.append('#5dade2')  # Medium blue
-                    else:
-                        colors.append('#85c1e9')  # Light blue
+                colors = ratio_colors(df_popular['times_ordered'],
+                                      ['#85c1e9', '#5dade2', '#3498db', '#2980b9'])
                 
                 fig_orders = go.Figure(go.Bar(
                     x=df_popular['times_ordered'],
@@ -2420,19 +2780,8 @@ def display_kitchen_analytics(days=7):
             
             with col2:
                 # Color by revenue - gradient from green to gold
-                max_revenue = df_popular['total_revenue'].max()
-                colors_revenue = []
-                for revenue in df_popular['total_revenue']:
-                    ratio = revenue / max_revenue if max_revenue > 0 else 0
-                    # Create green to gold gradient
-                    if ratio > 0.8:
-                        colors_revenue.append('#f39c12')  # Gold
-                    elif ratio > 0.6:
-                        colors_revenue.append('#27ae60')  # Green
-                    elif ratio > 0.4:
-                        colors_revenue.append('#2ecc71')  # Light green
-                    else:
-                        colors_revenue.append('#58d68d')  # Very light green
+                colors_revenue = ratio_colors(df_popular['total_revenue'],
+                                              ['#58d68d', '#2ecc71', '#27ae60', '#f39c12'])
                 
                 fig_revenue = go.Figure(go.Bar(
                     x=df_popular['total_revenue'],
@@ -2522,9 +2871,12 @@ def display_kitchen_analytics(days=7):
 
 # Update the display_customer_analytics function with color-coded bars
 def display_customer_analytics():
+    import plotly.express as px
+    import plotly.graph_objects as go
+    
     st.markdown("## 👥 Customer Insights")
     
-    customer_data = db.get_customer_insights()
+    customer_data = cached_customer_insights()
     
     if not customer_data:
         st.warning("No customer data available yet. Customer insights will appear after orders are placed.")
@@ -2533,31 +2885,19 @@ def display_customer_analytics():
     # Customer Segmentation - ENHANCED: Color-coded bars
     st.markdown("### 🎯 Customer Segmentation")
     if customer_data['frequency_analysis']:
-        # Convert to proper DataFrame with column names
-        segment_data = []
-        for row in customer_data['frequency_analysis']:
-            segment_data.append({
-                'frequency': row['frequency'],
-                'customer_count': row['customer_count'],
-                'avg_lifetime_value': row['avg_lifetime_value'],
-                'total_revenue': row['total_revenue']
-            })
-        
-        df_segments = pd.DataFrame(segment_data)
+        df_segments = records_frame(customer_data['frequency_analysis'], {
+            'frequency': 'object',
+            'customer_count': 'int64',
+            'avg_lifetime_value': 'float64',
+            'total_revenue': 'float64'
+        })
         
         if not df_segments.empty:
             col1, col2 = st.columns(2)
             
             with col1:
                 # Color by customer segment
-                segment_colors = {
-                    'VIP': '#e74c3c',        # Red - Premium
-                    'Regular': '#3498db',    # Blue - Regular
-                    'Occasional': '#2ecc71', # Green - Occasional
-                    'One-time': '#f39c12'    # Orange - One-time
-                }
-                
-                colors = [segment_colors.get(segment, '#95a5a6') for segment in df_segments['frequency']]
+                colors = [SEGMENT_COLORS.get(segment, '#95a5a6') for segment in df_segments['frequency']]
                 
                 fig_pie = px.pie(df_segments, values='customer_count', names='frequency',
                                 title='Customer Distribution by Frequency',
@@ -2575,20 +2915,9 @@ def display_customer_analytics():
                 st.plotly_chart(fig_pie, use_container_width=True)
             
             with col2:
-                # Color bars by lifetime value
-                max_value = df_segments['avg_lifetime_value'].max()
-                colors_lifetime = []
-                for value in df_segments['avg_lifetime_value']:
-                    ratio = value / max_value if max_value > 0 else 0
-                    # Create purple gradient for lifetime value
-                    if ratio > 0.8:
-                        colors_lifetime.append('#8e44ad')  # Dark purple
-                    elif ratio > 0.6:
-                        colors_lifetime.append('#9b59b6')  # Purple
-                    elif ratio > 0.4:
-                        colors_lifetime.append('#bb8fce')  # Light purple
-                    else:
-                        colors_lifetime.append('#d7bde2')  # Very light purple
+                # Color bars by lifetime value - purple gradient
+                colors_lifetime = ratio_colors(df_segments['avg_lifetime_value'],
+                                               ['#d7bde2', '#bb8fce', '#9b59b6', '#8e44ad'])
                 
                 fig_bar = go.Figure(go.Bar(
                     x=df_segments['frequency'],
@@ -2651,31 +2980,18 @@ def display_customer_analytics():
     # Top Customers - ENHANCED: Color-coded bars
     st.markdown("### 🏆 Top Customers by Lifetime Value")
     if customer_data['top_customers']:
-        # Convert to proper DataFrame with column names
-        top_customer_data = []
-        for row in customer_data['top_customers']:
-            top_customer_data.append({
-                'customer_name': row['customer_name'],
-                'total_orders': row['total_orders'],
-                'total_spent': row['total_spent'],
-                'average_order_value': row['average_order_value'],
-                'customer_segment': row['customer_segment'],
-                'last_order_date': row['last_order_date']
-            })
-        
-        df_top = pd.DataFrame(top_customer_data).head(10)
+        df_top = records_frame(customer_data['top_customers'], {
+            'customer_name': 'object',
+            'total_orders': 'int64',
+            'total_spent': 'float64',
+            'average_order_value': 'float64',
+            'customer_segment': 'object',
+            'last_order_date': 'object'
+        }).head(10)
         
         if not df_top.empty:
             # Color mapping for customer segments
-            segment_colors = {
-                'VIP': '#e74c3c',
-                'Regular': '#3498db', 
-                'Occasional': '#2ecc71',
-                'One-time': '#f39c12',
-                'New': '#95a5a6'
-            }
-            
-            colors = [segment_colors.get(segment, '#95a5a6') for segment in df_top['customer_segment']]
+            colors = [SEGMENT_COLORS.get(segment, '#95a5a6') for segment in df_top['customer_segment']]
             
             fig = go.Figure(go.Bar(
                 x=df_top['total_spent'],
@@ -2725,9 +3041,11 @@ def display_customer_analytics():
     else:
         st.info("Top customers data will appear after more orders are placed")
 def display_customer_analytics():
+    import plotly.express as px
+    
     st.markdown("## 👥 Customer Insights")
     
-    customer_data = db.get_customer_insights()
+    customer_data = cached_customer_insights()
     
     if not customer_data:
         st.warning("No customer data available yet. Customer insights will appear after orders are placed.")
@@ -2736,17 +3054,12 @@ def display_customer_analytics():
     # Customer Segmentation - FIXED: Proper DataFrame creation
     st.markdown("### 🎯 Customer Segmentation")
     if customer_data['frequency_analysis']:
-        # Convert to proper DataFrame with column names
-        segment_data = []
-        for row in customer_data['frequency_analysis']:
-            segment_data.append({
-                'frequency': row['frequency'],
-                'customer_count': row['customer_count'],
-                'avg_lifetime_value': row['avg_lifetime_value'],
-                'total_revenue': row['total_revenue']
-            })
-        
-        df_segments = pd.DataFrame(segment_data)
+        df_segments = records_frame(customer_data['frequency_analysis'], {
+            'frequency': 'object',
+            'customer_count': 'int64',
+            'avg_lifetime_value': 'float64',
+            'total_revenue': 'float64'
+        })
         
         if not df_segments.empty:
             col1, col2 = st.columns(2)
@@ -2770,19 +3083,14 @@ def display_customer_analytics():
     # Top Customers - FIXED: Proper DataFrame creation
     st.markdown("### 🏆 Top Customers by Lifetime Value")
     if customer_data['top_customers']:
-        # Convert to proper DataFrame with column names
-        top_customer_data = []
-        for row in customer_data['top_customers']:
-            top_customer_data.append({
-                'customer_name': row['customer_name'],
-                'total_orders': row['total_orders'],
-                'total_spent': row['total_spent'],
-                'average_order_value': row['average_order_value'],
-                'customer_segment': row['customer_segment'],
-                'last_order_date': row['last_order_date']
-            })
-        
-        df_top = pd.DataFrame(top_customer_data).head(10)
+        df_top = records_frame(customer_data['top_customers'], {
+            'customer_name': 'object',
+            'total_orders': 'int64',
+            'total_spent': 'float64',
+            'average_order_value': 'float64',
+            'customer_segment': 'object',
+            'last_order_date': 'object'
+        }).head(10)
         
         if not df_top.empty:
             fig = px.bar(df_top, x='customer_name', y='total_spent',
@@ -2798,17 +3106,12 @@ def display_customer_analytics():
     # Ordering Patterns Heatmap - FIXED: Proper DataFrame creation
     st.markdown("### 📊 Ordering Patterns Heatmap")
     if customer_data['ordering_patterns']:
-        # Convert to proper DataFrame with column names
-        pattern_data = []
-        for row in customer_data['ordering_patterns']:
-            pattern_data.append({
-                'day_of_week': row['day_of_week'],
-                'hour': row['hour'],
-                'order_count': row['order_count'],
-                'avg_order_value': row['avg_order_value']
-            })
-        
-        df_patterns = pd.DataFrame(pattern_data)
+        df_patterns = records_frame(customer_data['ordering_patterns'], {
+            'day_of_week': 'object',
+            'hour': 'object',
+            'order_count': 'int64',
+            'avg_order_value': 'float64'
+        })
         
         # Ensure we have the required columns
         if all(col in df_patterns.columns for col in ['day_of_week', 'hour', 'order_count']):
@@ -2840,9 +3143,9 @@ def display_recommendations():
     st.markdown("## 🎯 Data-Driven Recommendations")
     
     # Get real data for recommendations
-    sales_data = db.get_sales_analytics(30)
-    financial_data = db.get_financial_metrics(30)
-    popular_items = db.get_popular_menu_items(30)
+    sales_data = cached_sales_analytics(30)
+    financial_data = cached_financial_metrics(30)
+    popular_items = cached_popular_menu_items(30)
     
     if not sales_data or not financial_data or not popular_items:
         st.warning("Collecting data... Recommendations will appear after more orders are processed.")
@@ -2942,7 +3245,7 @@ def display_recommendations():
             """)
     
     with alerts_col3:
-        total_orders_today = db.get_orders_completed_today()
+        total_orders_today = cached_orders_completed_today()
         if total_orders_today < 5:
             st.info(f"""
             **Today's Orders**
@@ -2960,8 +3263,6 @@ def display_recommendations():
 
 # Enhanced QR Code Management
 def qr_management():
-    load_css()
-    
     st.markdown("""
     <div class="main-header">
         <h1 style="font-size: 3rem; margin-bottom: 1rem;">Digital Experience</h1>
@@ -2984,7 +3285,7 @@ def qr_management():
         
         if st.button("Generate QR Code", type="primary", use_container_width=True):
             qr_img = generate_qr_code(qr_url)
-            st.image(f"data:image/png;base64,{qr_img}", width=qr_size)
+            st.image(qr_img, width=qr_size)
             st.success("✅ QR Code generated successfully!")
     
     with col2:
@@ -2996,7 +3297,7 @@ def qr_management():
         """, unsafe_allow_html=True)
         
         # Real QR code usage data
-        total_orders = db.get_orders_completed_today()
+        total_orders = cached_orders_completed_today()
         st.metric("Total Scans", f"{total_orders * 3 + 47}", "+12 this week")
         st.metric("Mobile Orders", f"{total_orders}", f"{min(80, max(40, total_orders * 5))}% of total")
         st.metric("Peak Scan Time", "19:30", "Dinner rush")
@@ -3027,18 +3328,20 @@ def staff_navigation():
         </div>
         """, unsafe_allow_html=True)
     
-    st.sidebar.markdown("---")
     page = st.sidebar.radio("**Navigation Menu**", 
                           [" Kitchen Dashboard", " Advanced Analytics", " QR Codes"])
     
-    st.sidebar.markdown("---")
-    st.sidebar.markdown("###  Quick Actions")
+    st.sidebar.markdown('<div class="sb-section"><h3>Quick Actions</h3></div>', unsafe_allow_html=True)
     
+    # Pages render below, so clearing the caches is enough - no second rerun
     if st.sidebar.button("🔄 Refresh All Data", use_container_width=True):
-        st.rerun()
+        # Only the data caches; QR codes and encoded photos don't go stale
+        clear_order_caches()
+        clear_analytics_caches()
+        clear_menu_cache()
     
     # Logout
-    st.sidebar.markdown("---")
+    st.sidebar.markdown('<div class="sb-section"></div>', unsafe_allow_html=True)
     if st.sidebar.button("Logout", type="primary", use_container_width=True):
         logout()
     
@@ -3050,12 +3353,8 @@ def staff_navigation():
     elif page == " QR Codes":
         qr_management()
 
-# Enhanced Landing Page
-def landing_page():
-    load_css()
-    
-    # Hero Section with beautiful background
-    st.markdown("""
+# Static landing page markup, built once at import instead of on every rerun
+LANDING_HERO_HTML = """
     <div class="hero-section">
         <h1 style="font-size: 4rem; margin-bottom: 1rem; background: linear-gradient(45deg, #FFD700, #FF6B35, #667eea); -webkit-background-clip: text; -webkit-text-fill-color: transparent;">Sanele Delights</h1>
         <p style="font-size: 1.5rem; margin-bottom: 2rem; opacity: 0.9;">Where Culinary Art Meets Exceptional Experience</p>
@@ -3071,152 +3370,167 @@ def landing_page():
             </div>
         </div>
     </div>
-    """, unsafe_allow_html=True)
-    
-    # Restaurant Showcase
-    st.markdown("""
+    """
+
+LANDING_SHOWCASE_HTML = """
     <div style="text-align: center; margin: 3rem 0;">
         <h2 style="color: #2E86AB; margin-bottom: 1rem;"> Our Premium Venues</h2>
         <p style="color: #666; font-size: 1.1rem;">Experience luxury across our exquisite locations</p>
     </div>
-    """, unsafe_allow_html=True)
-    
-    # Restaurant images gallery
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.image("https://images.unsplash.com/photo-1517248135467-4c7edcad34c4?w=400&h=250&fit=crop", 
-                 use_container_width=True, caption="Main Dining Hall")
-        st.markdown("**Elegant Fine Dining**")
-        st.caption("Sophisticated atmosphere with crystal chandeliers")
-    
-    with col2:
-        st.image("https://images.unsplash.com/photo-1559329007-40df8a9345d8?w=400&h=250&fit=crop", 
-                 use_container_width=True, caption="Garden Terrace")
-        st.markdown("**Al Fresco Experience**")
-        st.caption("Beautiful outdoor seating with city views")
-    
-    with col3:
-        st.image("https://images.unsplash.com/photo-1414235077428-338989a2e8c0?w=400&h=250&fit=crop", 
-                 use_container_width=True, caption="Private Chef's Table")
-        st.markdown("**Exclusive Private Dining**")
-        st.caption("Intimate setting with personalized service")
-    
-    # Features Grid
-    st.markdown("---")
-    st.markdown("""
+    """
+
+# Venue gallery: (image url, caption, title, blurb). The figure markup never
+# changes, so it is built here and the browser fetches and caches the images
+LANDING_VENUES = (
+    ("https://images.unsplash.com/photo-1517248135467-4c7edcad34c4?w=400&h=250&fit=crop&auto=format&q=75",
+     "Main Dining Hall", "Elegant Fine Dining", "Sophisticated atmosphere with crystal chandeliers"),
+    ("https://images.unsplash.com/photo-1559329007-40df8a9345d8?w=400&h=250&fit=crop&auto=format&q=75",
+     "Garden Terrace", "Al Fresco Experience", "Beautiful outdoor seating with city views"),
+    ("https://images.unsplash.com/photo-1414235077428-338989a2e8c0?w=400&h=250&fit=crop&auto=format&q=75",
+     "Private Chef's Table", "Exclusive Private Dining", "Intimate setting with personalized service"),
+)
+
+# Gallery and feature cards are each one grid element rather than st.columns
+LANDING_VENUES_HTML = (
+    '<div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(220px, 1fr)); gap: 1.5rem;">'
+    + "".join(f"""<div>{image_figure(url, caption, radius=12).strip()}
+        <p style="font-weight: bold; margin: 0;">{title}</p>
+        <p style="color: #888; font-size: 0.9rem;">{blurb}</p>
+    </div>""" for url, caption, title, blurb in LANDING_VENUES)
+    + '</div>'
+)
+
+LANDING_FEATURES_HTML = """
     <div style="text-align: center; margin: 3rem 0;">
         <h2 style="color: #2E86AB; margin-bottom: 1rem;"> Why Choose Sanele Delights?</h2>
         <p style="color: #666; font-size: 1.1rem;">Unparalleled dining experiences crafted with passion</p>
     </div>
-    """, unsafe_allow_html=True)
+    """
+
+LANDING_FEATURES = (
+    ("🍽️", "Culinary Excellence", "Award-winning chefs creating innovative dishes with locally-sourced, premium ingredients"),
+    ("⚡", "Seamless Experience", "From digital ordering to real-time tracking, enjoy a frictionless premium dining journey"),
+    ("🌟", "Luxury Service", "Impeccable service, elegant ambiance, and attention to every detail for an unforgettable experience"),
+)
+
+LANDING_FEATURE_CARDS_HTML = (
+    '<div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(220px, 1fr)); gap: 1.5rem;">'
+    + "".join(f"""<div class="feature-card">
+        <div style="font-size: 4rem;">{icon}</div>
+        <h3 style="color: #2E86AB;">{title}</h3>
+        <p style="color: #666;">{desc}</p>
+    </div>""" for icon, title, desc in LANDING_FEATURES)
+    + '</div>'
+)
+
+LANDING_JOURNEY_HTML = """
+    <div style="text-align: center; margin: 3rem 0;">
+        <h2 style="color: #2E86AB; margin-bottom: 1rem;"> Your Culinary Journey</h2>
+        <p style="color: #666; font-size: 1.1rem;">Experience the future of fine dining in four simple steps</p>
+    </div>
+    """
+
+LANDING_STEP_DATA = (
+    {"icon": "📱", "title": "Scan & Browse", "desc": "Use your device to explore our curated menu with stunning visuals"},
+    {"icon": "🛒", "title": "Customize Order", "desc": "Select premium dishes and add personal preferences"},
+    {"icon": "👨‍🍳", "title": "Chef's Preparation", "desc": "Watch as master chefs craft your culinary masterpiece"},
+    {"icon": "🎯", "title": "Savor & Enjoy", "desc": "Indulge in an exceptional dining experience"}
+)
+
+# All four step cards in one grid, sent as a single markdown element
+LANDING_STEPS_HTML = (
+    '<div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(180px, 1fr)); gap: 1rem;">'
+    + "".join(f"""<div style="background: white; padding: 2rem 1rem; border-radius: 20px; box-shadow: 0 5px 15px rgba(0,0,0,0.08); text-align: center; height: 100%;">
+        <div style="font-size: 3rem; margin-bottom: 1rem;">{data['icon']}</div>
+        <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; width: 40px; height: 40px; border-radius: 50%; display: flex; align-items: center; justify-content: center; font-weight: bold; margin: 0 auto 1rem auto;">{idx + 1}</div>
+        <h4 style="color: #2E86AB; margin-bottom: 0.5rem;">{data['title']}</h4>
+        <p style="font-size: 0.9rem; color: #666; margin: 0;">{data['desc']}</p>
+    </div>""" for idx, data in enumerate(LANDING_STEP_DATA))
+    + '</div>'
+)
+
+LANDING_CTA_HTML = """
+    <div style="text-align: center; background: linear-gradient(135deg, #f8f9fa 0%, #e9ecef 100%); 
+                padding: 3rem 2rem; border-radius: 25px; margin: 2rem 0;">
+        <h2 style="color: #2E86AB; margin-bottom: 1rem;">Ready to Begin Your Culinary Adventure?</h2>
+        <p style="color: #666; font-size: 1.1rem; margin-bottom: 2rem;">Join us for an unforgettable dining experience</p>
+    </div>
+    """
+
+def prewarm_staff_imports():
+    """Import the analytics and QR dependencies ahead of the first staff page"""
+    import pandas
+    import plotly.express
+    import plotly.graph_objects
+    import qrcode
+
+# Enhanced Landing Page
+def landing_page():
+    # Hero Section with beautiful background
+    st.markdown(LANDING_HERO_HTML, unsafe_allow_html=True)
     
-    features = st.columns(3)
+    # Restaurant Showcase
+    st.markdown(LANDING_SHOWCASE_HTML, unsafe_allow_html=True)
     
-    with features[0]:
-        st.markdown("""
-        <div class="feature-card">
-            <div style="font-size: 4rem;">🍽️</div>
-            <h3 style="color: #2E86AB;">Culinary Excellence</h3>
-            <p style="color: #666;">Award-winning chefs creating innovative dishes with locally-sourced, premium ingredients</p>
-        </div>
-        """, unsafe_allow_html=True)
+    # Restaurant images gallery
+    st.markdown(LANDING_VENUES_HTML, unsafe_allow_html=True)
     
-    with features[1]:
-        st.markdown("""
-        <div class="feature-card">
-            <div style="font-size: 4rem;">⚡</div>
-            <h3 style="color: #2E86AB;">Seamless Experience</h3>
-            <p style="color: #666;">From digital ordering to real-time tracking, enjoy a frictionless premium dining journey</p>
-        </div>
-        """, unsafe_allow_html=True)
+    # Features Grid
+    st.markdown("---")
+    st.markdown(LANDING_FEATURES_HTML, unsafe_allow_html=True)
     
-    with features[2]:
-        st.markdown("""
-        <div class="feature-card">
-            <div style="font-size: 4rem;">🌟</div>
-            <h3 style="color: #2E86AB;">Luxury Service</h3>
-            <p style="color: #666;">Impeccable service, elegant ambiance, and attention to every detail for an unforgettable experience</p>
-        </div>
-        """, unsafe_allow_html=True)
+    st.markdown(LANDING_FEATURE_CARDS_HTML, unsafe_allow_html=True)
     
     # How It Works
     st.markdown("---")
-    st.markdown("""
-    <div style="text-align: center; margin: 3rem 0;">
-        <h2 style="color: #2E86AB; margin-bottom: 1rem;"> Your Culinary Journey</h2>
-        <p style="color: #666; font-size: 1.1rem;">Experience the future of fine dining in four simple steps</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(LANDING_JOURNEY_HTML, unsafe_allow_html=True)
     
-    steps = st.columns(4)
-    
-    step_data = [
-        {"icon": "📱", "title": "Scan & Browse", "desc": "Use your device to explore our curated menu with stunning visuals"},
-        {"icon": "🛒", "title": "Customize Order", "desc": "Select premium dishes and add personal preferences"},
-        {"icon": "👨‍🍳", "title": "Chef's Preparation", "desc": "Watch as master chefs craft your culinary masterpiece"},
-        {"icon": "🎯", "title": "Savor & Enjoy", "desc": "Indulge in an exceptional dining experience"}
-    ]
-    
-    for idx, step in enumerate(steps):
-        with step:
-            data = step_data[idx]
-            st.markdown(f"""
-            <div style="background: white; padding: 2rem 1rem; border-radius: 20px; box-shadow: 0 5px 15px rgba(0,0,0,0.08); text-align: center; height: 100%;">
-                <div style="font-size: 3rem; margin-bottom: 1rem;">{data['icon']}</div>
-                <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; width: 40px; height: 40px; border-radius: 50%; display: flex; align-items: center; justify-content: center; font-weight: bold; margin: 0 auto 1rem auto;">{idx + 1}</div>
-                <h4 style="color: #2E86AB; margin-bottom: 0.5rem;">{data['title']}</h4>
-                <p style="font-size: 0.9rem; color: #666; margin: 0;">{data['desc']}</p>
-            </div>
-            """, unsafe_allow_html=True)
+    st.markdown(LANDING_STEPS_HTML, unsafe_allow_html=True)
     
     # Call to Action
     st.markdown("---")
-    st.markdown("""
-    <div style="text-align: center; background: linear-gradient(135deg, #f8f9fa 0%, #e9ecef 100%); 
-                padding: 3rem 2rem; border-radius: 25px; margin: 2rem 0;">
-        <h2 style="color: #2E86AB; margin-bottom: 1rem;">Ready to Begin Your Culinary Adventure?</h2>
-        <p style="color: #666; font-size: 1.1rem; margin-bottom: 2rem;">Join us for an unforgettable dining experience</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(LANDING_CTA_HTML, unsafe_allow_html=True)
     
     # Action Buttons
     col1, col2 = st.columns(2)
     
     with col1:
         if st.button("**Start Your Order**", type="primary", use_container_width=True):
-            st.session_state.page = "customer"
-            st.rerun()
+            st.switch_page(CUSTOMER_PAGE)
     
     with col2:
         if st.button("**Staff Portal**", use_container_width=True):
-            st.session_state.page = "staff"
-            st.rerun()
+            st.switch_page(STAFF_PAGE)
+    
+    # Warm the staff-only imports in the background while the landing page is read
+    if 'plotly.express' not in sys.modules:
+        threading.Thread(target=prewarm_staff_imports, daemon=True).start()
+
+def staff_portal():
+    """Staff dashboards once logged in, otherwise the login form"""
+    if st.session_state.logged_in:
+        staff_navigation()
+    else:
+        staff_login()
+        if st.sidebar.button("← Back to Home"):
+            st.switch_page(LANDING_PAGE)
+
+# Each view is its own page with its own URL; only the active one runs
+LANDING_PAGE = st.Page(landing_page, title="Sanele Delights", icon="🍽️", url_path="home", default=True)
+CUSTOMER_PAGE = st.Page(customer_ordering, title="Order", icon="🛒", url_path="order")
+STAFF_PAGE = st.Page(staff_portal, title="Staff Portal", icon="👨‍🍳", url_path="staff")
 
 # Main Application
 def main():
-    st.set_page_config(
-        page_title="Sanele Delights - Premium Restaurant",
-        page_icon="🍽️",
-        layout="wide",
-        initial_sidebar_state="expanded"
-    )
-    
     init_session_state()
+    load_css()
     
-    # Page routing
-    if st.session_state.page == "landing":
-        landing_page()
-    elif st.session_state.page == "customer":
-        customer_ordering()
-    elif st.session_state.page == "staff":
-        if st.session_state.logged_in:
-            staff_navigation()
-        else:
-            staff_login()
-            if st.sidebar.button("← Back to Home"):
-                st.session_state.page = "landing"
-                st.rerun()
+    page = st.navigation([LANDING_PAGE, CUSTOMER_PAGE, STAFF_PAGE], position="hidden")
+    # A looked-up order is only kept while the customer stays on the order page
+    if page.url_path != CUSTOMER_PAGE.url_path:
+        for key in TRACKING_SESSION_KEYS:
+            st.session_state.pop(key, None)
+    page.run()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
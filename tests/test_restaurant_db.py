@@ -0,0 +1,117 @@
+import hashlib
+import importlib.util
+import os
+from pathlib import Path
+
+import pytest
+
+APP_PATH = Path(__file__).resolve().parent.parent / "food_I_love_you.py"
+
+
+@pytest.fixture(scope="module")
+def app(tmp_path_factory):
+    # Importing the app opens restaurant.db in the working directory, so keep
+    # that (and everything the tests write) inside a scratch directory
+    workdir = tmp_path_factory.mktemp("app")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        spec = importlib.util.spec_from_file_location("food_app", APP_PATH)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        yield module
+    finally:
+        os.chdir(cwd)
+
+
+@pytest.fixture
+def db(app, tmp_path):
+    return app.RestaurantDB(str(tmp_path / "test.db"))
+
+
+def menu_line(db, quantity=1, index=0):
+    row = db.conn.execute('SELECT id, name, price FROM menu_items ORDER BY id LIMIT 1 OFFSET ?', (index,)).fetchone()
+    return {'id': row['id'], 'name': row['name'], 'price': row['price'], 'quantity': quantity, 'instructions': ''}
+
+
+def place(db, *items):
+    return db.add_order("Test Customer", "dine-in", list(items), 1, "", "cash")
+
+
+def test_add_order_total_is_summed_by_trigger(db):
+    first, second = menu_line(db, quantity=2), menu_line(db, quantity=3, index=1)
+    order_id, _ = place(db, first, second)
+
+    total = db.conn.execute('SELECT total_amount FROM orders WHERE id = ?', (order_id,)).fetchone()['total_amount']
+    assert total == pytest.approx(first['price'] * 2 + second['price'] * 3)
+
+
+def test_order_item_insert_updates_total(db):
+    line = menu_line(db)
+    order_id, _ = place(db, line)
+    db.conn.execute('''
+        INSERT INTO order_items (order_id, menu_item_id, menu_item_name, quantity, price)
+        VALUES (?, ?, ?, 2, 10)
+    ''', (order_id, line['id'], line['name']))
+    db.conn.commit()
+
+    total = db.conn.execute('SELECT total_amount FROM orders WHERE id = ?', (order_id,)).fetchone()['total_amount']
+    assert total == pytest.approx(line['price'] + 20)
+
+
+def test_active_orders_keyset_pages_cover_every_order_once(db):
+    # Orders placed within the same second share order_date, so paging has to break ties on id
+    order_ids = [place(db, menu_line(db))[0] for _ in range(5)]
+
+    seen, before = [], None
+    while True:
+        page = db.get_active_orders(limit=2, before=before)
+        if not page:
+            break
+        seen.extend(row['id'] for row in page)
+        before = (page[-1]['order_date'], page[-1]['id'])
+
+    assert seen == sorted(order_ids, reverse=True)
+
+
+def test_bulk_update_order_status_applies_every_op(db):
+    first, _ = place(db, menu_line(db))
+    second, _ = place(db, menu_line(db))
+
+    assert db.bulk_update_order_status([(first, 'preparing', 'a'), (second, 'ready', 'b')])
+
+    statuses = dict(db.conn.execute('SELECT id, status FROM orders').fetchall())
+    assert statuses == {first: 'preparing', second: 'ready'}
+    history = db.conn.execute('SELECT order_id, status FROM order_status_history WHERE notes IN (?, ?)', ('a', 'b')).fetchall()
+    assert sorted(map(tuple, history)) == [(first, 'preparing'), (second, 'ready')]
+
+
+def test_bulk_update_order_status_rolls_back_on_failure(db):
+    order_id, _ = place(db, menu_line(db))
+
+    # The history row for a missing order breaks its foreign key
+    assert not db.bulk_update_order_status([(order_id, 'preparing', ''), (999999, 'ready', '')])
+
+    assert not db.conn.in_transaction
+    assert db.conn.execute('SELECT status FROM orders WHERE id = ?', (order_id,)).fetchone()['status'] == 'pending'
+    assert db.conn.execute('SELECT COUNT(*) FROM order_status_history WHERE order_id = ?', (order_id,)).fetchone()[0] == 1
+
+
+def test_authenticate_staff_checks_scrypt_hash(db):
+    assert db.authenticate_staff('admin', 'admin123')['role'] == 'admin'
+    assert db.authenticate_staff('admin', 'wrong') is None
+    assert db.authenticate_staff('nobody', 'admin123') is None
+
+
+def test_authenticate_staff_upgrades_legacy_sha256(db):
+    legacy = hashlib.sha256(b'legacy-pass').hexdigest()
+    db.conn.execute("INSERT INTO users (username, password, role) VALUES ('legacy', ?, 'staff')", (legacy,))
+    db.conn.commit()
+
+    user = db.authenticate_staff('legacy', 'legacy-pass')
+
+    assert user == {'id': user['id'], 'username': 'legacy', 'role': 'staff'}
+    stored = db.conn.execute("SELECT password FROM users WHERE username = 'legacy'").fetchone()['password']
+    assert stored != legacy and '$' in stored
+    assert db.authenticate_staff('legacy', 'legacy-pass') is not None
+    assert db.authenticate_staff('legacy', 'wrong') is None